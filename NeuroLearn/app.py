@@ -1,78 +1,256 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash
+from flask import Flask, Request, request, jsonify, render_template, redirect, url_for, session, flash
+import io
+import json
+import re
 import tempfile
 import os
 import logging
 from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
-from datetime import datetime
+import threading
 import secrets
+from concurrent.futures import ThreadPoolExecutor
+from db_schema import DB_PATH, INTERRUPTED_JOB_RESULT, fail_interrupted_jobs, init_db
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+    LIMITER_AVAILABLE = True
+except ImportError:
+    LIMITER_AVAILABLE = False
+
+try:
+    from cachetools import TTLCache
+    CACHETOOLS_AVAILABLE = True
+except ImportError:
+    CACHETOOLS_AVAILABLE = False
 
 # Import your modules - make sure these exist and work
 try:
     from question_generator import generate_questions
     from assessment import PerformanceAnalyzer
+    # Stateless apart from its topic cache, so one instance serves every request
+    performance_analyzer = PerformanceAnalyzer()
 except ImportError as e:
     print(f"Warning: Could not import modules: {e}")
 
+# Upload spool size: PDFs up to this size stay in memory while the form is parsed
+UPLOAD_SPOOL_SIZE = 8 * 1024 * 1024
+
+class UploadSpool(tempfile.SpooledTemporaryFile):
+    """Uploaded file buffered in memory up to UPLOAD_SPOOL_SIZE, named after the upload"""
+    
+    def __init__(self, filename=None):
+        super().__init__(max_size=UPLOAD_SPOOL_SIZE)
+        self.filename = filename
+    
+    @property
+    def name(self):
+        # The question generator reports PDFs by name in logs and errors
+        return self.filename
+
+class SpooledUploadRequest(Request):
+    """Request that buffers uploaded files in memory instead of Werkzeug's 500KB disk spill"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool(filename)
+
 app = Flask(__name__)
+app.request_class = SpooledUploadRequest
 
 # Configure app
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['SECRET_KEY'] = secrets.token_hex(16)  # Generate a secure secret key
+# The jsonify fallback (no orjson) shouldn't spend time sorting keys on large question payloads
+app.json.sort_keys = False
+# Use a persistent key so sessions survive restarts; the random key is only a fallback for local runs
+app.config['SECRET_KEY'] = os.environ.get('NEUROLEARN_SECRET_KEY') or secrets.token_hex(16)
+
+# Per-IP limit on login attempts, which caps the password-hashing work one client can cause.
+# The default memory:// storage counts per process, so under gunicorn the effective limit is
+# the per-route limit times the worker count; point NEUROLEARN_RATELIMIT_STORAGE at redis://
+# (or memcached://) to share counts across workers.
+RATELIMIT_STORAGE = os.getenv('NEUROLEARN_RATELIMIT_STORAGE', 'memory://')
+limiter = Limiter(
+    get_remote_address,
+    app=app,
+    default_limits=[],
+    storage_uri=RATELIMIT_STORAGE
+) if LIMITER_AVAILABLE else None
+
+def rate_limit(limit, **kwargs):
+    """Apply a flask-limiter limit when the package is installed"""
+    if limiter is None:
+        return lambda f: f
+    return limiter.limit(limit, **kwargs)
+
+# Shared defaults for validating generated questions and submitted results
+VALID_DIFFICULTIES = frozenset(('easy', 'medium', 'advanced'))
+DEFAULT_DIFFICULTY = 'medium'
+DEFAULT_ANSWER = 'A'
+DEFAULT_USER_ANSWER = 'SKIP'
+DEFAULT_TOPIC = 'General'
+DEFAULT_OPTIONS = ('Option A', 'Option B', 'Option C', 'Option D')
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# Password hashing cost: scrypt with N=2**15, r=8, p=1 (~32MB, tens of ms per hash).
+# hashlib runs scrypt in OpenSSL with the GIL released, so other worker threads keep serving
+# while a login hashes. Existing hashes carry their own method and still verify.
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database setup
-def init_db():
-    """Initialize the database with user and test_history tables"""
-    conn = sqlite3.connect('gate_app.db')
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            full_name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_login TIMESTAMP
-        )
-    ''')
-    
-    # Test history table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS test_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            test_name TEXT,
-            total_questions INTEGER,
-            correct_answers INTEGER,
-            score_percentage REAL,
-            time_taken INTEGER,
-            difficulty TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    logger.info("Database initialized successfully")
-
-# Initialize database on startup
-init_db()
+if not os.environ.get('NEUROLEARN_SECRET_KEY'):
+    # Each gunicorn worker would also get its own key, breaking sessions across workers
+    logger.warning("NEUROLEARN_SECRET_KEY not set; sessions will not survive restarts or span workers")
+
+if limiter is None:
+    logger.warning("Flask-Limiter not installed; login attempts are not rate limited")
+elif RATELIMIT_STORAGE.startswith('memory://'):
+    logger.warning("NEUROLEARN_RATELIMIT_STORAGE not set; login rate limits are counted per worker process")
+
+# Database setup (the schema lives in db_schema.py)
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database tables (flask --app app init-db)"""
+    init_db()
+
+# Initialize database on startup, unless deployment already ran init-db (gunicorn does it once in the master)
+if os.environ.get('NEUROLEARN_SKIP_INIT') != '1':
+    init_db()
+
+def json_bytes(data):
+    """Serialize to JSON bytes with orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, default=str, ensure_ascii=False).encode('utf-8')
+
+def ojsonify(data, status=200):
+    """JSON response serialized with orjson when available (falls back to jsonify)"""
+    if not ORJSON_AVAILABLE:
+        response = jsonify(data)
+        response.status_code = status
+        return response
+    return app.response_class(json_bytes(data), status=status, mimetype='application/json')
+
+# SQL used by the routes; fixed statement text lets each connection's statement cache reuse compiled queries
+# Login: UNION ALL of two index lookups, since OR across columns can fall back to a table scan
+_Q_FIND_USER = '''
+    SELECT id, username, full_name, password_hash FROM users WHERE username = ?1
+    UNION ALL
+    SELECT id, username, full_name, password_hash FROM users WHERE email = ?1 AND username <> ?1
+    LIMIT 1
+'''
+_Q_UPDATE_LAST_LOGIN = 'UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?'
+_Q_USER_EXISTS = '''
+    SELECT id FROM users WHERE username = ?
+    UNION ALL
+    SELECT id FROM users WHERE email = ?
+    LIMIT 1
+'''
+_Q_INSERT_USER = 'INSERT INTO users (full_name, username, email, password_hash) VALUES (?, ?, ?, ?)'
+_Q_PROFILE = 'SELECT id, username, email, full_name, created_at, last_login FROM users WHERE id = ?'
+_Q_RECENT_HISTORY = '''
+    SELECT test_name, total_questions, correct_answers, score_percentage,
+           time_taken, difficulty, created_at
+    FROM test_history
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT 10
+'''
+_Q_LATEST_TEST_ID = 'SELECT MAX(id) FROM test_history WHERE user_id = ?'
+_Q_DASHBOARD_STATS = '''
+    SELECT
+        COUNT(*) as total_tests,
+        AVG(score_percentage) as avg_score,
+        MAX(score_percentage) as best_score,
+        SUM(time_taken) as total_time
+    FROM test_history
+    WHERE user_id = ?
+'''
+_Q_INSERT_HISTORY = '''
+    INSERT INTO test_history
+    (user_id, test_name, total_questions, correct_answers, score_percentage, time_taken, difficulty)
+    VALUES (?, 'Test ' || strftime('%Y-%m-%d %H:%M', 'now', 'localtime'), ?, ?, ?, ?, ?)
+'''
+_Q_INSERT_QUESTION_HISTORY = '''
+    INSERT INTO test_question_history
+    (test_id, user_id, question_number, user_answer, correct_answer, is_correct, time_taken)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+_Q_INSERT_JOB = "INSERT INTO generation_jobs (id, user_id, status) VALUES (?, ?, 'queued')"
+_Q_UPDATE_JOB = 'UPDATE generation_jobs SET status = ?, result = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?'
+_Q_JOB_STATUS = 'SELECT status, result FROM generation_jobs WHERE id = ? AND user_id = ?'
+# A job whose worker died (restart, timeout) never updates its row again, so polling expires it
+_Q_EXPIRE_JOB = '''
+    UPDATE generation_jobs SET status = 'failed', result = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ? AND status IN ('queued', 'running') AND updated_at < datetime('now', ?)
+'''
+
+# One long-lived connection per worker thread; SQLite allows a single writer, so writes share a lock
+_db_local = threading.local()
+_db_write_lock = threading.Lock()
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('gate_app.db')
-    conn.row_factory = sqlite3.Row
+    """Get this thread's database connection, opening it on first use"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, timeout=30,
+                               cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        # journal_mode=WAL and page_size persist in the file (set by init_db); these are per-connection
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-32000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA foreign_keys=ON')
+        _db_local.conn = conn
     return conn
 
+# Per-user dashboard data: (latest test id, recent test history, aggregate stats). Each worker process
+# has its own cache, so entries are only used while the user's latest test id still matches.
+_dashboard_cache = TTLCache(maxsize=10_000, ttl=300) if CACHETOOLS_AVAILABLE else None
+_dashboard_cache_lock = threading.Lock()
+
+# Profile rows keyed by user_id; there is no profile editing yet, so entries only expire
+_user_cache = TTLCache(maxsize=10_000, ttl=600) if CACHETOOLS_AVAILABLE else None
+_user_cache_lock = threading.Lock()
+
+def query_one(conn, sql, params=()):
+    """Run a query and return its first row, closing the cursor right away"""
+    cursor = conn.execute(sql, params)
+    try:
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+def query_all(conn, sql, params=()):
+    """Run a query and return all rows, closing the cursor right away"""
+    cursor = conn.execute(sql, params)
+    try:
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+@app.teardown_appcontext
+def finish_db_transaction(exception):
+    """Finish any open transaction; the connection itself stays open for the next request"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        if exception is None:
+            conn.commit()
+        else:
+            conn.rollback()
+
 def login_required(f):
     """Decorator to require login for certain routes"""
     from functools import wraps
@@ -92,6 +270,7 @@ def index():
     return redirect(url_for('login'))
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limit("5 per minute", methods=['POST'])
 def login():
     """Login page"""
     if request.method == 'POST':
@@ -102,26 +281,20 @@ def login():
             flash('Please enter both username and password.', 'error')
             return render_template('login.html')
         
+        # Lookup and last-login update share one connection; the write only happens on success
         conn = get_db_connection()
-        user = conn.execute(
-            'SELECT * FROM users WHERE username = ? OR email = ?', 
-            (username, username)
-        ).fetchone()
-        conn.close()
+        user = query_one(conn, _Q_FIND_USER, (username,))
         
         if user and check_password_hash(user['password_hash'], password):
+            # Display fields live in the signed session cookie, so pages don't re-query them
+            session.permanent = True
             session['user_id'] = user['id']
             session['username'] = user['username']
             session['full_name'] = user['full_name']
             
-            # Update last login
-            conn = get_db_connection()
-            conn.execute(
-                'UPDATE users SET last_login = ? WHERE id = ?',
-                (datetime.now(), user['id'])
-            )
-            conn.commit()
-            conn.close()
+            # Update last login (autocommit: a single statement, a single commit)
+            with _db_write_lock:
+                conn.execute(_Q_UPDATE_LAST_LOGIN, (user['id'],))
             
             flash(f'Welcome back, {user["full_name"]}!', 'success')
             return redirect(url_for('dashboard'))
@@ -140,56 +313,42 @@ def register():
         password = request.form.get('password', '')
         confirm_password = request.form.get('confirm_password', '')
         
-        # Validation
-        errors = []
-        
-        if not full_name or len(full_name) < 2:
-            errors.append('Full name must be at least 2 characters long.')
-        
-        if not username or len(username) < 3:
-            errors.append('Username must be at least 3 characters long.')
-        
-        if not email or '@' not in email:
-            errors.append('Please enter a valid email address.')
-        
-        if not password or len(password) < 6:
-            errors.append('Password must be at least 6 characters long.')
-        
-        if password != confirm_password:
-            errors.append('Passwords do not match.')
+        # Validation: stop at the first failing check
+        if len(full_name) < 2:
+            error = 'Full name must be at least 2 characters long.'
+        elif len(username) < 3:
+            error = 'Username must be at least 3 characters long.'
+        elif not EMAIL_PATTERN.match(email):
+            error = 'Please enter a valid email address.'
+        elif len(password) < 6:
+            error = 'Password must be at least 6 characters long.'
+        elif password != confirm_password:
+            error = 'Passwords do not match.'
+        else:
+            error = None
         
-        if errors:
-            for error in errors:
-                flash(error, 'error')
+        if error:
+            flash(error, 'error')
             return render_template('register.html')
         
         # Check if user already exists
         conn = get_db_connection()
-        existing_user = conn.execute(
-            'SELECT id FROM users WHERE username = ? OR email = ?',
-            (username, email)
-        ).fetchone()
+        existing_user = query_one(conn, _Q_USER_EXISTS, (username, email))
         
         if existing_user:
             flash('Username or email already exists.', 'error')
-            conn.close()
             return render_template('register.html')
         
         # Create new user
-        password_hash = generate_password_hash(password)
+        password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
         try:
-            conn.execute(
-                'INSERT INTO users (full_name, username, email, password_hash) VALUES (?, ?, ?, ?)',
-                (full_name, username, email, password_hash)
-            )
-            conn.commit()
-            conn.close()
+            with _db_write_lock:
+                conn.execute(_Q_INSERT_USER, (full_name, username, email, password_hash))
             
             flash('Registration successful! You can now log in.', 'success')
             return redirect(url_for('login'))
         except sqlite3.IntegrityError:
             flash('Username or email already exists.', 'error')
-            conn.close()
             return render_template('register.html')
     
     return render_template('register.html')
@@ -205,29 +364,27 @@ def logout():
 @login_required
 def dashboard():
     """Main dashboard after login"""
-    # Get user's test history
+    user_id = session['user_id']
     conn = get_db_connection()
-    test_history = conn.execute(
-        '''SELECT * FROM test_history 
-           WHERE user_id = ? 
-           ORDER BY created_at DESC 
-           LIMIT 10''',
-        (session['user_id'],)
-    ).fetchall()
+    
+    # One indexed read tells whether a test was saved (by any worker) since the entry was cached
+    latest_test_id = query_one(conn, _Q_LATEST_TEST_ID, (user_id,))[0]
+    if _dashboard_cache is not None:
+        with _dashboard_cache_lock:
+            cached = _dashboard_cache.get(user_id)
+        if cached is not None and cached[0] == latest_test_id:
+            _, test_history, stats = cached
+            return render_template('dashboard.html', test_history=test_history, stats=stats)
+    
+    # Get user's test history
+    test_history = query_all(conn, _Q_RECENT_HISTORY, (user_id,))
     
     # Get user stats
-    stats = conn.execute(
-        '''SELECT 
-           COUNT(*) as total_tests,
-           AVG(score_percentage) as avg_score,
-           MAX(score_percentage) as best_score,
-           SUM(time_taken) as total_time
-           FROM test_history 
-           WHERE user_id = ?''',
-        (session['user_id'],)
-    ).fetchone()
+    stats = query_one(conn, _Q_DASHBOARD_STATS, (user_id,))
     
-    conn.close()
+    if _dashboard_cache is not None:
+        with _dashboard_cache_lock:
+            _dashboard_cache[user_id] = (latest_test_id, tuple(test_history), stats)
     
     return render_template('dashboard.html', test_history=test_history, stats=stats)
 
@@ -244,15 +401,123 @@ def test_page():
 @login_required
 def profile():
     """User profile page"""
-    conn = get_db_connection()
-    user = conn.execute(
-        'SELECT * FROM users WHERE id = ?',
-        (session['user_id'],)
-    ).fetchone()
-    conn.close()
+    user_id = session['user_id']
+    user = None
+    if _user_cache is not None:
+        with _user_cache_lock:
+            user = _user_cache.get(user_id)
+    
+    if user is None:
+        conn = get_db_connection()
+        user = query_one(conn, _Q_PROFILE, (user_id,))
+        if user is not None and _user_cache is not None:
+            with _user_cache_lock:
+                _user_cache[user_id] = user
     
     return render_template('profile.html', user=user)
 
+def run_question_generation(pdf_sources, difficulty, questions_count):
+    """Generate and validate questions, returning (response payload, HTTP status)"""
+    try:
+        # Generate questions
+        logger.info(f"Generating {questions_count} {difficulty} questions from {len(pdf_sources)} PDFs")
+        
+        result = generate_questions(
+            pdf_sources, 
+            difficulty, 
+            questions_count, 
+            save_files=False
+        )
+        
+        # Validate the result structure
+        if not isinstance(result, dict) or 'questions' not in result:
+            return {
+                'success': False,
+                'error': 'Invalid response from question generator'
+            }, 500
+        
+        # Process questions
+        questions = result.get('questions', [])
+        validated_questions = []
+        
+        for i, q in enumerate(questions):
+            if not isinstance(q, dict):
+                continue
+                
+            question = q.get('question')
+            if question is None:
+                question = f'Question {i+1}'
+            options = q.get('options')
+            if not isinstance(options, list) or not options:
+                options = DEFAULT_OPTIONS
+            
+            validated_questions.append({
+                'question': question,
+                'options': options,
+                'correct_answer': q.get('correct_answer', DEFAULT_ANSWER),
+                'difficulty': q.get('difficulty', difficulty),
+                'topic': q.get('topic', DEFAULT_TOPIC),
+                'explanation': q.get('explanation', '')
+            })
+        
+        if not validated_questions:
+            return {
+                'success': False,
+                'error': 'No valid questions could be generated from the provided PDFs'
+            }, 500
+        
+        logger.info(f"Successfully generated {len(validated_questions)} questions")
+        
+        return {
+            'success': True,
+            'message': f'Generated {len(validated_questions)} questions successfully',
+            'questions': validated_questions
+        }, 200
+
+    except Exception as e:
+        logger.error(f"Error generating questions: {str(e)}")
+        return {
+            'success': False,
+            'error': f'Failed to generate questions: {str(e)}'
+        }, 500
+
+# Question generation jobs run here so the request thread is freed; job state lives in SQLite
+# so any worker process can answer the status poll. (Their async Gemini calls share
+# question_generator's single event loop rather than starting one per job.)
+_job_executor = ThreadPoolExecutor(max_workers=int(os.getenv('NEUROLEARN_JOB_WORKERS', 2)))
+
+# Queued jobs hold their PDFs in memory, so cap how many a worker accepts (running ones included)
+MAX_PENDING_JOBS = int(os.getenv('NEUROLEARN_MAX_PENDING_JOBS', 8))
+_job_slots = threading.BoundedSemaphore(MAX_PENDING_JOBS)
+
+# Jobs not updated for this long are reported as failed when polled
+JOB_STALE_SECONDS = int(os.getenv('NEUROLEARN_JOB_STALE_SECONDS', 1800))
+
+def run_generation_job(job_id, pdf_sources, difficulty, questions_count):
+    """Background job: generate questions and store the response payload for polling"""
+    conn = get_db_connection()
+    try:
+        with _db_write_lock:
+            conn.execute(_Q_UPDATE_JOB, ('running', None, job_id))
+        payload, status = run_question_generation(pdf_sources, difficulty, questions_count)
+        job_status = 'done' if status == 200 else 'failed'
+        with _db_write_lock:
+            conn.execute(_Q_UPDATE_JOB, (job_status, json_bytes(payload).decode('utf-8'), job_id))
+    except Exception as e:
+        logger.error(f"Question generation job {job_id} failed: {e}")
+        try:
+            with _db_write_lock:
+                conn.execute(_Q_UPDATE_JOB, ('failed', json_bytes({
+                    'success': False,
+                    'error': 'An unexpected error occurred. Please try again.'
+                }).decode('utf-8'), job_id))
+        except sqlite3.Error as db_error:
+            logger.error(f"Failed to record job {job_id} failure: {db_error}")
+    finally:
+        for pdf_source in pdf_sources:
+            pdf_source.close()
+        _job_slots.release()
+
 # API Routes (existing functionality)
 @app.route('/api/generate_questions', methods=['POST'])
 @login_required
@@ -261,23 +526,33 @@ def api_generate_questions():
     try:
         # Validate request
         if 'pdf_files' not in request.files:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No PDF files provided'
-            }), 400
+            }, 400)
 
         files = request.files.getlist('pdf_files')
         
-        if not files or all(f.filename == '' for f in files):
-            return jsonify({
+        # One pass: note whether anything was selected and keep the PDFs
+        pdf_files = []
+        any_selected = False
+        for f in files:
+            filename = f.filename
+            if filename:
+                any_selected = True
+                if filename[-4:].lower() == '.pdf':
+                    pdf_files.append(f)
+        
+        if not any_selected:
+            return ojsonify({
                 'success': False,
                 'error': 'No files selected'
-            }), 400
+            }, 400)
 
         # Get parameters with validation
-        difficulty = request.form.get('difficulty', 'medium')
-        if difficulty not in ['easy', 'medium', 'advanced']:
-            difficulty = 'medium'
+        difficulty = request.form.get('difficulty', DEFAULT_DIFFICULTY)
+        if difficulty not in VALID_DIFFICULTIES:
+            difficulty = DEFAULT_DIFFICULTY
 
         try:
             questions_count = int(request.form.get('questions', 10))
@@ -286,114 +561,107 @@ def api_generate_questions():
         except (ValueError, TypeError):
             questions_count = 10
 
-        # Validate file types
-        pdf_files = []
-        for f in files:
-            if f and f.filename.lower().endswith('.pdf'):
-                pdf_files.append(f)
-        
         if not pdf_files:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Please upload valid PDF files'
-            }), 400
-
-        # Save PDFs temporarily
-        pdf_paths = []
-        temp_files = []
+            }, 400)
+
+        # The extractor reads file-like objects directly, so hand it each upload's spool as is.
+        # The request closes its files when it ends; it gets an empty stream in place of each
+        # spool so a background job can keep reading the one it was given.
+        pdf_sources = []
+        total_bytes = 0
+        for f in pdf_files:
+            pdf_source = f.stream
+            total_bytes += pdf_source.seek(0, io.SEEK_END)
+            pdf_source.seek(0)
+            f.stream = io.BytesIO()
+            pdf_sources.append(pdf_source)
+            logger.debug("Loaded PDF: %s", f.filename)
+        logger.info("Loaded %d PDFs (%d bytes total)", len(pdf_sources), total_bytes)
         
-        try:
-            for f in pdf_files:
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.pdf')
-                os.close(temp_fd)
-                
-                f.save(temp_path)
-                pdf_paths.append(temp_path)
-                temp_files.append(temp_path)
-                
-                logger.info(f"Saved PDF: {f.filename} to {temp_path}")
-
-            # Generate questions
-            logger.info(f"Generating {questions_count} {difficulty} questions from {len(pdf_paths)} PDFs")
-            
-            result = generate_questions(
-                pdf_paths, 
-                difficulty, 
-                questions_count, 
-                save_files=False
-            )
-            
-            # Validate the result structure
-            if not isinstance(result, dict) or 'questions' not in result:
-                return jsonify({
+        # Background mode: return a job id right away; the client polls /api/job/<job_id>
+        if request.values.get('async') == '1':
+            if not _job_slots.acquire(blocking=False):
+                for pdf_source in pdf_sources:
+                    pdf_source.close()
+                response = ojsonify({
                     'success': False,
-                    'error': 'Invalid response from question generator'
-                }), 500
+                    'error': 'Too many question generation jobs are queued. Please try again shortly.'
+                }, 503)
+                response.headers['Retry-After'] = '30'
+                return response
             
-            # Process questions
-            questions = result.get('questions', [])
-            validated_questions = []
-            
-            for i, q in enumerate(questions):
-                if not isinstance(q, dict):
-                    continue
-                    
-                validated_q = {
-                    'question': q.get('question', f'Question {i+1}'),
-                    'options': q.get('options', []),
-                    'correct_answer': q.get('correct_answer', 'A'),
-                    'difficulty': q.get('difficulty', difficulty),
-                    'topic': q.get('topic', 'General'),
-                    'explanation': q.get('explanation', '')
-                }
-                
-                if not isinstance(validated_q['options'], list) or len(validated_q['options']) == 0:
-                    validated_q['options'] = ['Option A', 'Option B', 'Option C', 'Option D']
-                
-                validated_questions.append(validated_q)
-            
-            if not validated_questions:
-                return jsonify({
-                    'success': False,
-                    'error': 'No valid questions could be generated from the provided PDFs'
-                }), 500
-            
-            logger.info(f"Successfully generated {len(validated_questions)} questions")
-            
-            return jsonify({
+            job_id = secrets.token_hex(16)
+            try:
+                conn = get_db_connection()
+                with _db_write_lock:
+                    conn.execute(_Q_INSERT_JOB, (job_id, session['user_id']))
+                _job_executor.submit(run_generation_job, job_id, pdf_sources, difficulty, questions_count)
+            except Exception:
+                # The job never started, so its slot and PDFs are not released by run_generation_job
+                _job_slots.release()
+                for pdf_source in pdf_sources:
+                    pdf_source.close()
+                raise
+            return ojsonify({
                 'success': True,
-                'questions': validated_questions,
-                'message': f'Generated {len(validated_questions)} questions successfully'
-            })
-
-        except Exception as e:
-            logger.error(f"Error generating questions: {str(e)}")
-            return jsonify({
-                'success': False,
-                'error': f'Failed to generate questions: {str(e)}'
-            }), 500
-            
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': url_for('api_job_status', job_id=job_id)
+            }, 202)
+        
+        try:
+            payload, status = run_question_generation(pdf_sources, difficulty, questions_count)
         finally:
-            # Cleanup temporary files
-            for temp_path in temp_files:
-                try:
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
-                        logger.info(f"Cleaned up temp file: {temp_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup temp file {temp_path}: {e}")
+            for pdf_source in pdf_sources:
+                pdf_source.close()
+        
+        # The questions are already built in memory, so a single body (with Content-Length) is cheapest
+        return ojsonify(payload, status)
 
     except RequestEntityTooLarge:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'File too large. Maximum size is 16MB per file.'
-        }), 413
+        }, 413)
     except Exception as e:
         logger.error(f"Unexpected error in generate_questions: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'An unexpected error occurred. Please try again.'
-        }), 500
+        }, 500)
+
+@app.route('/api/job/<job_id>')
+@login_required
+def api_job_status(job_id):
+    """Status of a background question generation job, with its result once finished"""
+    conn = get_db_connection()
+    job = query_one(conn, _Q_JOB_STATUS, (job_id, session['user_id']))
+    if job is None:
+        return ojsonify({
+            'success': False,
+            'error': 'Job not found'
+        }, 404)
+    
+    if job['status'] in ('queued', 'running'):
+        with _db_write_lock:
+            expired = conn.execute(
+                _Q_EXPIRE_JOB, (INTERRUPTED_JOB_RESULT, job_id, f'-{JOB_STALE_SECONDS} seconds')
+            ).rowcount
+        if expired:
+            job = query_one(conn, _Q_JOB_STATUS, (job_id, session['user_id']))
+    
+    if job['result'] is None:
+        return ojsonify({'success': True, 'job_id': job_id, 'status': job['status']})
+    
+    # The stored result is already serialized, so splice it in rather than re-encoding it
+    body = json_bytes({'success': True, 'job_id': job_id, 'status': job['status']})
+    return app.response_class(
+        body[:-1] + b',"result":' + job['result'].encode('utf-8') + b'}',
+        mimetype='application/json'
+    )
 
 @app.route('/api/submit_results', methods=['POST'])
 @login_required
@@ -401,77 +669,87 @@ def api_submit_results():
     """Analyze and return performance results"""
     try:
         if not request.is_json:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Request must be JSON'
-            }), 400
+            }, 400)
 
         data = request.get_json()
         if not data:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No data provided'
-            }), 400
+            }, 400)
 
         results = data.get('results', [])
         
         if not isinstance(results, list) or len(results) == 0:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No results provided'
-            }), 400
+            }, 400)
 
-        # Process results
+        # Process results, accumulating the score totals in the same pass
         validated_results = []
+        correct_count = 0
+        total_time = 0
         for i, result in enumerate(results):
             if not isinstance(result, dict):
                 continue
-                
-            validated_result = {
-                'question_number': result.get('question_number', i + 1),
-                'question': result.get('question', ''),
-                'user_answer': result.get('user_answer', 'SKIP'),
-                'correct_answer': result.get('correct_answer', 'A'),
-                'is_correct': result.get('is_correct', False),
-                'time_taken': result.get('time_taken', 0),
-                'difficulty': result.get('difficulty', 'medium'),
-                'topic': result.get('topic', 'General'),
-                'skipped': result.get('skipped', False)
-            }
-            validated_results.append(validated_result)
+            
+            get = result.get
+            is_correct = get('is_correct', False)
+            time_taken = get('time_taken', 0)
+            validated_results.append({
+                'question_number': get('question_number', i + 1),
+                'question': get('question', ''),
+                'user_answer': get('user_answer', DEFAULT_USER_ANSWER),
+                'correct_answer': get('correct_answer', DEFAULT_ANSWER),
+                'is_correct': is_correct,
+                'time_taken': time_taken,
+                'difficulty': get('difficulty', DEFAULT_DIFFICULTY),
+                'topic': get('topic', DEFAULT_TOPIC),
+                'skipped': get('skipped', False)
+            })
+            if is_correct:
+                correct_count += 1
+            total_time += time_taken
 
         if not validated_results:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'No valid results to analyze'
-            }), 400
+            }, 400)
 
         # Calculate basic stats
-        correct_count = sum(1 for r in validated_results if r['is_correct'])
         total_questions = len(validated_results)
         score_percentage = round((correct_count / total_questions) * 100, 2)
-        total_time = sum(r['time_taken'] for r in validated_results)
-        difficulty = validated_results[0]['difficulty'] if validated_results else 'medium'
+        difficulty = validated_results[0]['difficulty'] if validated_results else DEFAULT_DIFFICULTY
 
         # Save to database
         try:
             conn = get_db_connection()
-            conn.execute(
-                '''INSERT INTO test_history 
-                   (user_id, test_name, total_questions, correct_answers, score_percentage, time_taken, difficulty)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                (session['user_id'], f'Test {datetime.now().strftime("%Y-%m-%d %H:%M")}', 
-                 total_questions, correct_count, score_percentage, total_time, difficulty)
-            )
-            conn.commit()
-            conn.close()
+            user_id = session['user_id']
+            # One transaction (one WAL commit) for the test row and all of its question rows
+            with _db_write_lock, conn:
+                conn.execute('BEGIN IMMEDIATE')
+                cursor = conn.execute(
+                    _Q_INSERT_HISTORY,
+                    (user_id, total_questions, correct_count, score_percentage, total_time, difficulty)
+                )
+                test_id = cursor.lastrowid
+                conn.executemany(
+                    _Q_INSERT_QUESTION_HISTORY,
+                    [(test_id, user_id, r['question_number'], r['user_answer'], r['correct_answer'],
+                      int(bool(r['is_correct'])), r['time_taken'])
+                     for r in validated_results]
+                )
         except Exception as e:
             logger.error(f"Failed to save test history: {e}")
 
         # Analyze performance
         try:
-            analyzer = PerformanceAnalyzer()
-            analysis = analyzer.analyze_performance(validated_results)
+            analysis = performance_analyzer.analyze_performance(validated_results)
             
             if not isinstance(analysis, dict):
                 analysis = {}
@@ -493,14 +771,14 @@ def api_submit_results():
             **analysis
         }
         
-        return jsonify(response_data)
+        return ojsonify(response_data)
 
     except Exception as e:
         logger.error(f"Unexpected error in submit_results: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'success': False,
             'error': 'An unexpected error occurred while analyzing results.'
-        }), 500
+        }, 500)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -518,4 +796,8 @@ if __name__ == '__main__':
         os.makedirs(templates_dir)
         logger.info(f"Created templates directory: {templates_dir}")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Nothing from an earlier server process can still be running its jobs
+    fail_interrupted_jobs()
+    
+    # Development server only; in production run: gunicorn -c gunicorn.conf.py app:app
+    app.run(debug=os.getenv('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
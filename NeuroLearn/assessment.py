@@ -4,36 +4,44 @@ import time
 import os
 import logging
 import sys
+import re
+import math
+import heapq
+import bisect
+import contextlib
+import operator
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, NamedTuple, Optional, Any, Tuple
 import threading
-from collections import defaultdict, Counter
-import statistics
+from collections import defaultdict, Counter, OrderedDict
 from pathlib import Path
 import traceback
+import functools
+import importlib.util
 
-# Optional imports with fallbacks
 try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    GEMINI_AVAILABLE = False
+    ORJSON_AVAILABLE = False
+
+def _module_available(name: str) -> bool:
+    """Check whether a module can be imported without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Optional imports with fallbacks (imported lazily by TestInterface.setup_gemini)
+GEMINI_AVAILABLE = _module_available('google.generativeai')
+if not GEMINI_AVAILABLE:
     logging.warning("Google Generative AI not available. Install with: pip install google-generativeai")
 
-try:
-    from dotenv import load_dotenv
-    DOTENV_AVAILABLE = True
-except ImportError:
-    DOTENV_AVAILABLE = False
+DOTENV_AVAILABLE = _module_available('dotenv')
+if not DOTENV_AVAILABLE:
     logging.warning("python-dotenv not available. Install with: pip install python-dotenv")
 
-# Import your question generator with error handling
-try:
-    from question_generator import generate_questions
-except ImportError as e:
-    logging.error(f"Failed to import question_generator: {e}")
-    print("Error: question_generator.py not found. Please ensure it's in the same directory.")
-    sys.exit(1)
+from response_cache import ExactResponseCache
 
 # Configure logging
 logging.basicConfig(
@@ -46,6 +54,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# The same analysis always yields the same coaching prompt, so reuse earlier feedback for it
+FEEDBACK_CACHE = ExactResponseCache(
+    db_path=os.getenv('NEUROLEARN_CACHE_DB', 'question_cache.db'),
+    ttl_days=30
+)
+
+def _results_json_bytes(data, pretty: bool = False) -> bytes:
+    """Serialize saved results to JSON bytes (compact unless pretty) with orjson when available"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+@functools.lru_cache(maxsize=1)
+def _get_api_key() -> Optional[str]:
+    """Load .env and read GEMINI_API_KEY once per process"""
+    if DOTENV_AVAILABLE:
+        from dotenv import load_dotenv
+        load_dotenv()
+    return os.getenv('GEMINI_API_KEY')
+
 class TestTimer:
     """Thread-safe timer for individual questions with improved reliability"""
     
@@ -64,22 +95,27 @@ class TestTimer:
             self.is_active = True
             self.time_up_callback = callback
             
-            def timer_countdown():
-                time.sleep(self.duration)
-                with self._lock:
-                    if self.is_active and self.time_up_callback:
-                        try:
-                            self.time_up_callback()
-                        except Exception as e:
-                            logger.error(f"Timer callback error: {e}")
-                    self.is_active = False
-            
-            self.timer_thread = threading.Thread(target=timer_countdown, daemon=True)
+            # Timer waits on an Event, so stop() can cancel it instead of leaving a thread asleep
+            self.timer_thread = threading.Timer(self.duration, self._time_up)
+            self.timer_thread.daemon = True
             self.timer_thread.start()
     
+    def _time_up(self):
+        """Mark the timer expired and run the callback outside the lock"""
+        with self._lock:
+            callback = self.time_up_callback if self.is_active else None
+            self.is_active = False
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Timer callback error: {e}")
+    
     def stop(self) -> float:
         """Stop the timer and return elapsed time"""
         with self._lock:
+            if self.timer_thread:
+                self.timer_thread.cancel()
             if self.start_time:
                 elapsed = time.time() - self.start_time
                 self.is_active = False
@@ -88,31 +124,95 @@ class TestTimer:
     
     def get_remaining_time(self) -> float:
         """Get remaining time in seconds"""
-        with self._lock:
-            if not self.start_time or not self.is_active:
-                return 0.0
-            elapsed = time.time() - self.start_time
-            remaining = max(0.0, self.duration - elapsed)
-            return remaining
+        # Read-only: single attribute reads are atomic, so pollers don't contend on the lock
+        start_time = self.start_time
+        if not start_time or not self.is_active:
+            return 0.0
+        return max(0.0, self.duration - (time.time() - start_time))
+
+def _build_keyword_scanner(topic_keywords: Dict[str, frozenset]) -> Tuple[Dict[str, Tuple[str, ...]], 're.Pattern']:
+    """Map each keyword to its topics and compile one whole-word pattern over all keywords"""
+    keyword_topics = defaultdict(list)
+    for topic, keywords in topic_keywords.items():
+        for keyword in keywords:
+            keyword_topics[sys.intern(keyword)].append(topic)
+    # Longest first so multi-word phrases win over their single-word prefixes
+    alternation = '|'.join(re.escape(k) for k in sorted(keyword_topics, key=len, reverse=True))
+    pattern = re.compile(r'(?<![\w-])(?:' + alternation + r')(?![\w-])')
+    return {k: tuple(v) for k, v in keyword_topics.items()}, pattern
+
+class ResultColumns(NamedTuple):
+    """Per-question fields pulled out of the result dicts once per analysis"""
+    times: List[Optional[float]]  # None marks a result with an invalid time_taken
+    correct: List[bool]
+    skipped: List[bool]
+
+class TrendStats(NamedTuple):
+    """Answered-question aggregates gathered in one pass for the trend and consistency metrics"""
+    response_times: List[float]
+    answered: int
+    first_third_time: float
+    last_third_time: float
+    first_third_accuracy: float
+    last_third_accuracy: float
+    mean_time: float
+    stdev_time: float
 
 class PerformanceAnalyzer:
     """Optimized performance analyzer with GATE-style negative marking"""
     
     # Class-level constants for better performance
     TOPIC_KEYWORDS = {
-        'mathematics': {'formula', 'equation', 'calculate', 'derivative', 'integral', 'matrix', 'algebra', 'calculus', 'probability'},
-        'circuits': {'circuit', 'voltage', 'current', 'resistance', 'capacitor', 'inductor', 'impedance', 'kcl', 'kvl', 'ohm'},
-        'signals': {'signal', 'frequency', 'amplitude', 'fourier', 'filter', 'modulation', 'spectrum', 'convolution', 'sampling'},
-        'control': {'control', 'feedback', 'stability', 'response', 'transfer function', 'pid', 'bode', 'nyquist', 'root locus'},
-        'digital': {'digital', 'logic', 'binary', 'gate', 'flip-flop', 'counter', 'memory', 'boolean', 'multiplexer'},
-        'power': {'power', 'energy', 'motor', 'generator', 'transformer', 'transmission', 'protection', 'synchronous'},
-        'communication': {'communication', 'antenna', 'modulation', 'channel', 'noise', 'protocol', 'coding', 'multiplexing'},
-        'electromagnetics': {'electromagnetic', 'wave', 'field', 'maxwell', 'transmission line', 'waveguide', 'antenna'},
-        'materials': {'material', 'semiconductor', 'conductor', 'dielectric', 'crystal', 'doping', 'band gap'},
-        'programming': {'algorithm', 'data structure', 'complexity', 'sorting', 'searching', 'graph', 'tree', 'dynamic'},
-        'networks': {'network', 'protocol', 'tcp', 'ip', 'routing', 'switching', 'osi', 'ethernet'},
-        'databases': {'database', 'sql', 'query', 'normalization', 'acid', 'transaction', 'index'}
+        'mathematics': frozenset({'formula', 'equation', 'calculate', 'derivative', 'integral', 'matrix', 'algebra', 'calculus', 'probability'}),
+        'circuits': frozenset({'circuit', 'voltage', 'current', 'resistance', 'capacitor', 'inductor', 'impedance', 'kcl', 'kvl', 'ohm'}),
+        'signals': frozenset({'signal', 'frequency', 'amplitude', 'fourier', 'filter', 'modulation', 'spectrum', 'convolution', 'sampling'}),
+        'control': frozenset({'control', 'feedback', 'stability', 'response', 'transfer function', 'pid', 'bode', 'nyquist', 'root locus'}),
+        'digital': frozenset({'digital', 'logic', 'binary', 'gate', 'flip-flop', 'counter', 'memory', 'boolean', 'multiplexer'}),
+        'power': frozenset({'power', 'energy', 'motor', 'generator', 'transformer', 'transmission', 'protection', 'synchronous'}),
+        'communication': frozenset({'communication', 'antenna', 'modulation', 'channel', 'noise', 'protocol', 'coding', 'multiplexing'}),
+        'electromagnetics': frozenset({'electromagnetic', 'wave', 'field', 'maxwell', 'transmission line', 'waveguide', 'antenna'}),
+        'materials': frozenset({'material', 'semiconductor', 'conductor', 'dielectric', 'crystal', 'doping', 'band gap'}),
+        'programming': frozenset({'algorithm', 'data structure', 'complexity', 'sorting', 'searching', 'graph', 'tree', 'dynamic'}),
+        'networks': frozenset({'network', 'protocol', 'tcp', 'ip', 'routing', 'switching', 'osi', 'ethernet'}),
+        'databases': frozenset({'database', 'sql', 'query', 'normalization', 'acid', 'transaction', 'index'})
     }
+    TOPIC_NAMES = tuple(sys.intern(topic) for topic in TOPIC_KEYWORDS)
+    KEYWORD_TOPICS, KEYWORD_PATTERN = _build_keyword_scanner(TOPIC_KEYWORDS)
+    
+    # Bound on cached topic lookups so a long-running server doesn't grow the cache forever
+    TOPIC_CACHE_SIZE = 1024
+    
+    # Lower score bound of each grade band, with the matching (grade, level) at the same index
+    GRADE_THRESHOLDS = (0, 35, 50, 65, 75, 85)
+    GRADE_TABLE = (
+        ('D', 'Poor - Fundamental Revision Required'),
+        ('C', 'Below Average - Extensive Preparation Needed'),
+        ('B', 'Average - Significant Preparation Required'),
+        ('B+', 'Good - Focused Improvement Needed'),
+        ('A', 'Very Good - Strong GATE Potential'),
+        ('A+', 'Excellent - GATE Ready')
+    )
+    
+    GRADE_EXPLANATIONS = {
+        'A+': "Outstanding performance with excellent negative marking strategy",
+        'A': "Very good performance with effective test-taking approach",
+        'B+': "Good performance but room for improvement in strategy or content",
+        'B': "Average performance requiring focused preparation",
+        'C': "Below average performance requiring significant improvement",
+        'D': "Poor performance requiring fundamental concept revision"
+    }
+    
+    # (efficiency metric, default when missing, comparison, threshold, message)
+    STRENGTH_RULES = (
+        ('attempt_rate', 0, operator.gt, 80, "Good attempt rate - not overly cautious"),
+        ('correct_attempt_ratio', 0, operator.gt, 70, "High accuracy on attempted questions"),
+        ('negative_impact', 100, operator.lt, 10, "Effective negative marking management")
+    )
+    GAP_RULES = (
+        ('negative_impact', 0, operator.gt, 15, "High negative marking impact"),
+        ('attempt_rate', 100, operator.lt, 60, "Low attempt rate - too cautious"),
+        ('correct_attempt_ratio', 100, operator.lt, 50, "Low accuracy on attempted questions")
+    )
     
     MARKING_SCHEME = {
         'correct_marks': 1.0,
@@ -123,32 +223,77 @@ class PerformanceAnalyzer:
     }
     
     def __init__(self):
-        self.topic_cache = {}  # Cache for topic categorization
+        self.topic_cache = OrderedDict()  # LRU cache for topic categorization
+        self._topic_lock = threading.Lock()
+        self._last_topic = (None, None)  # Single-entry (key, topic) fast path; one attribute so shared use stays consistent
     
     def categorize_question_topic(self, question_text: str, pdf_reference: str = "") -> str:
         """Optimized topic categorization with caching"""
-        # Create cache key
-        cache_key = hash(question_text + pdf_reference)
-        if cache_key in self.topic_cache:
-            return self.topic_cache[cache_key]
+        # Tuple key: no concatenation of the two strings just to look them up
+        cache_key = (question_text, pdf_reference)
+        last_key, last_topic = self._last_topic
+        if cache_key == last_key:
+            return last_topic
+        with self._topic_lock:
+            cached = self.topic_cache.get(cache_key)
+            if cached is not None:
+                self.topic_cache.move_to_end(cache_key)
+        if cached is not None:
+            self._last_topic = (cache_key, cached)
+            return cached
         
         text_to_analyze = (question_text + " " + pdf_reference).lower()
-        text_words = set(text_to_analyze.split())
-        
-        topic_scores = {}
-        for topic, keywords in self.TOPIC_KEYWORDS.items():
-            # Use set intersection for faster matching
-            score = len(keywords.intersection(text_words))
-            if score > 0:
-                topic_scores[topic] = score
+        # One scan over the text; handles multi-word keywords such as "root locus"
+        matched = set(self.KEYWORD_PATTERN.findall(text_to_analyze))
         
-        result = max(topic_scores, key=topic_scores.get) if topic_scores else 'general'
+        if not matched:
+            result = 'general'
+        elif len(matched) == 1:
+            # A single keyword decides it; KEYWORD_TOPICS lists its topics in TOPIC_KEYWORDS order
+            result = self.KEYWORD_TOPICS[matched.pop()][0]
+        else:
+            topic_scores = Counter()
+            for keyword in matched:
+                for topic in self.KEYWORD_TOPICS[keyword]:
+                    topic_scores[topic] += 1
+            
+            # Ties go to the topic listed first in TOPIC_KEYWORDS
+            result = max(self.TOPIC_NAMES, key=lambda t: topic_scores[t])
         
-        # Cache the result
-        self.topic_cache[cache_key] = result
+        # Cache the result, evicting the least recently used entry when full
+        with self._topic_lock:
+            self.topic_cache[cache_key] = result
+            if len(self.topic_cache) > self.TOPIC_CACHE_SIZE:
+                self.topic_cache.popitem(last=False)
+        self._last_topic = (cache_key, result)
         return result
     
-    def calculate_marks_with_negative_grading(self, test_results: List[Dict]) -> Dict[str, Any]:
+    @staticmethod
+    def _to_columns(test_results: List[Dict]) -> ResultColumns:
+        """Extract times and answer flags from the result dicts in one pass"""
+        # An unusable time_taken becomes None: the answer is still marked and counted everywhere,
+        # only its time is left out of the time statistics
+        times = []
+        correct = []
+        skipped = []
+        malformed = []
+        for i, result in enumerate(test_results):
+            time_taken = result.get('time_taken', 0)
+            if type(time_taken) is not float:
+                try:
+                    time_taken = float(time_taken)
+                except (TypeError, ValueError):
+                    time_taken = None
+                    malformed.append(i)
+            times.append(time_taken)
+            correct.append(bool(result.get('is_correct', False)))
+            skipped.append(bool(result.get('is_skipped', False)))
+        if malformed:
+            logger.warning(f"Ignoring invalid time_taken (answers still marked) for results: {malformed}")
+        return ResultColumns(times, correct, skipped)
+    
+    def calculate_marks_with_negative_grading(self, test_results: List[Dict],
+                                              columns: Optional[ResultColumns] = None) -> Dict[str, Any]:
         """Optimized negative marking calculation"""
         if not test_results:
             return {'error': 'No test results provided'}
@@ -156,56 +301,53 @@ class PerformanceAnalyzer:
         total_marks = 0.0
         positive_marks = 0.0
         negative_marks = 0.0
+        correct_count = incorrect_count = skipped_count = 0
         question_wise_marks = []
         
-        # Vectorized calculation for better performance
-        for i, result in enumerate(test_results):
-            try:
-                marks_earned = 0.0
-                time_taken = float(result.get('time_taken', 0))
-                
-                if result.get('is_skipped', False):
-                    marks_earned = self.MARKING_SCHEME['skip_marks']
-                    marking_type = 'skipped'
-                elif result.get('is_correct', False):
-                    marks_earned = self.MARKING_SCHEME['correct_marks']
-                    
-                    # Time bonus for quick correct answers
-                    if time_taken < self.MARKING_SCHEME['time_bonus_threshold']:
-                        time_bonus = 0.1
-                        marks_earned += time_bonus
-                        positive_marks += self.MARKING_SCHEME['correct_marks'] + time_bonus
-                    else:
-                        positive_marks += self.MARKING_SCHEME['correct_marks']
-                    
-                    marking_type = 'correct'
+        # Read the marking scheme once instead of on every question
+        skip_marks = self.MARKING_SCHEME['skip_marks']
+        correct_marks = self.MARKING_SCHEME['correct_marks']
+        incorrect_penalty = self.MARKING_SCHEME['incorrect_penalty']
+        time_bonus_threshold = self.MARKING_SCHEME['time_bonus_threshold']
+        time_bonus = 0.1
+        
+        # Validate once up front so the marking loop needs no per-question try block
+        if columns is None:
+            columns = self._to_columns(test_results)
+        
+        for i, (result, time_taken, is_correct, is_skipped) in enumerate(zip(test_results, *columns)):
+            if is_skipped:
+                marks_earned = skip_marks
+                marking_type = 'skipped'
+                skipped_count += 1
+            elif is_correct:
+                # Time bonus for quick correct answers (never for an unknown time)
+                if time_taken is not None and time_taken < time_bonus_threshold:
+                    marks_earned = correct_marks + time_bonus
                 else:
-                    marks_earned = self.MARKING_SCHEME['incorrect_penalty']
-                    negative_marks += abs(marks_earned)
-                    marking_type = 'incorrect'
-                
-                total_marks += marks_earned
-                
-                question_wise_marks.append({
-                    'question_number': result.get('question_number', i + 1),
-                    'marks_earned': round(marks_earned, 3),
-                    'marking_type': marking_type,
-                    'time_taken': time_taken
-                })
-                
-            except (KeyError, TypeError, ValueError) as e:
-                logger.warning(f"Error processing result {i}: {e}")
-                continue
+                    marks_earned = correct_marks
+                positive_marks += marks_earned
+                marking_type = 'correct'
+                correct_count += 1
+            else:
+                marks_earned = incorrect_penalty
+                negative_marks -= incorrect_penalty
+                marking_type = 'incorrect'
+                incorrect_count += 1
+            
+            total_marks += marks_earned
+            
+            question_wise_marks.append({
+                'question_number': result.get('question_number', i + 1),
+                'marks_earned': round(marks_earned, 3),
+                'marking_type': marking_type,
+                'time_taken': time_taken
+            })
         
         # Calculate derived metrics
         max_possible_marks = len(test_results) * self.MARKING_SCHEME['correct_marks']
         percentage_score = (total_marks / max_possible_marks) * 100 if max_possible_marks > 0 else 0
         
-        # Answer distribution
-        correct_count = sum(1 for r in test_results if r.get('is_correct', False))
-        incorrect_count = sum(1 for r in test_results if not r.get('is_correct', False) and not r.get('is_skipped', False))
-        skipped_count = sum(1 for r in test_results if r.get('is_skipped', False))
-        
         return {
             'marking_summary': {
                 'total_marks_earned': round(total_marks, 3),
@@ -231,15 +373,28 @@ class PerformanceAnalyzer:
             'marking_scheme_used': self.MARKING_SCHEME
         }
     
-    def analyze_strategy_effectiveness(self, test_results: List[Dict]) -> Dict[str, Any]:
+    def analyze_strategy_effectiveness(self, test_results: List[Dict],
+                                       precomputed_counts: Optional[Dict[str, int]] = None,
+                                       columns: Optional[ResultColumns] = None) -> Dict[str, Any]:
         """Analyze effectiveness of negative marking strategy"""
         if not test_results:
             return {'error': 'No test results to analyze'}
         
         total_questions = len(test_results)
-        correct = sum(1 for r in test_results if r.get('is_correct', False))
-        incorrect = sum(1 for r in test_results if not r.get('is_correct', False) and not r.get('is_skipped', False))
-        skipped = sum(1 for r in test_results if r.get('is_skipped', False))
+        if precomputed_counts is not None:
+            # answer_distribution from calculate_marks_with_negative_grading
+            correct = precomputed_counts['correct_answers']
+            incorrect = precomputed_counts['incorrect_answers']
+            skipped = precomputed_counts['skipped_answers']
+        else:
+            correct = incorrect = skipped = 0
+            for r in test_results:
+                if r.get('is_skipped', False):
+                    skipped += 1
+                elif r.get('is_correct', False):
+                    correct += 1
+                else:
+                    incorrect += 1
         
         # Current strategy performance
         current_marks = (correct * 1) + (incorrect * (-1/3))
@@ -269,7 +424,9 @@ class PerformanceAnalyzer:
             strategy_recommendations.append("Good balance between attempting and skipping")
         
         # Calculate confidence threshold
-        confidence_threshold = self._calculate_confidence_threshold(test_results)
+        if columns is None:
+            columns = self._to_columns(test_results)
+        confidence_threshold = self._calculate_confidence_threshold(columns)
         
         return {
             'current_performance': {
@@ -292,17 +449,25 @@ class PerformanceAnalyzer:
             'confidence_threshold': confidence_threshold
         }
     
-    def _calculate_confidence_threshold(self, test_results: List[Dict]) -> str:
+    def _calculate_confidence_threshold(self, columns: ResultColumns) -> str:
         """Calculate recommended confidence threshold"""
-        if not test_results:
+        if not columns.times:
             return 'medium_confidence'
         
         # Analyze time vs accuracy patterns
-        quick_answers = [r for r in test_results if r.get('time_taken', 60) < 40]
-        slow_answers = [r for r in test_results if r.get('time_taken', 0) > 50]
+        quick_total = quick_correct = slow_total = slow_correct = 0
+        for time_taken, is_correct in zip(columns.times, columns.correct):
+            if time_taken is None:
+                continue
+            if time_taken < 40:
+                quick_total += 1
+                quick_correct += is_correct
+            elif time_taken > 50:
+                slow_total += 1
+                slow_correct += is_correct
         
-        quick_accuracy = sum(1 for r in quick_answers if r.get('is_correct', False)) / max(1, len(quick_answers))
-        slow_accuracy = sum(1 for r in slow_answers if r.get('is_correct', False)) / max(1, len(slow_answers))
+        quick_accuracy = quick_correct / max(1, quick_total)
+        slow_accuracy = slow_correct / max(1, slow_total)
         
         if quick_accuracy > 0.8 and slow_accuracy < 0.4:
             return 'trust_quick_instincts'
@@ -317,13 +482,18 @@ class PerformanceAnalyzer:
             if not test_results:
                 return {"error": "No test results to analyze"}
             
+            # Pull the per-question fields out of the result dicts once for every pass below
+            columns = self._to_columns(test_results)
+            
             # Get marking analysis
-            marking_analysis = self.calculate_marks_with_negative_grading(test_results)
+            marking_analysis = self.calculate_marks_with_negative_grading(test_results, columns)
             if 'error' in marking_analysis:
                 return marking_analysis
             
             # Get strategy analysis
-            strategy_analysis = self.analyze_strategy_effectiveness(test_results)
+            strategy_analysis = self.analyze_strategy_effectiveness(
+                test_results, precomputed_counts=marking_analysis['answer_distribution'], columns=columns
+            )
             if 'error' in strategy_analysis:
                 strategy_analysis = {'error': 'Strategy analysis failed'}
             
@@ -333,47 +503,34 @@ class PerformanceAnalyzer:
             skipped_questions = marking_analysis['answer_distribution']['skipped_answers']
             performance_score = marking_analysis['marking_summary']['percentage_score']
             
-            # Time analysis with error handling
-            response_times = []
-            for result in test_results:
-                if not result.get('is_skipped', False):
-                    try:
-                        time_val = float(result.get('time_taken', 0))
-                        if 0 <= time_val <= 300:  # Reasonable time bounds
-                            response_times.append(time_val)
-                    except (ValueError, TypeError):
-                        continue
+            # Time analysis and performance trends from a single pass
+            trend_stats = self._compute_trend_stats(columns)
+            response_times = trend_stats.response_times
             
-            avg_time = statistics.mean(response_times) if response_times else 0
-            median_time = statistics.median(response_times) if response_times else 0
+            avg_time = trend_stats.mean_time
+            median_time = self._median(response_times)
             
             # Topic-wise analysis
-            topic_analysis = self._analyze_topics_with_negative_marking(test_results, avg_time)
+            topic_analysis = self._analyze_topics_with_negative_marking(test_results, avg_time, columns)
             
             # Performance trends
-            time_trend = self._analyze_time_trend(test_results)
-            accuracy_trend = self._analyze_accuracy_trend(test_results)
-            
-            # Problem areas identification
-            weak_topics = sorted(
-                [(topic, data) for topic, data in topic_analysis.items() 
-                 if data['questions_attempted'] > 0],
-                key=lambda x: x[1]['score_percentage']
-            )[:3]
+            time_trend = self._analyze_time_trend(trend_stats)
+            accuracy_trend = self._analyze_accuracy_trend(trend_stats)
             
-            time_consuming_topics = sorted(
-                [(topic, data) for topic, data in topic_analysis.items() 
-                 if data['questions_attempted'] > 0],
-                key=lambda x: x[1]['average_time_seconds'],
-                reverse=True
-            )[:3]
+            # Problem areas identification (top three without sorting every topic)
+            attempted_topics = [(topic, data) for topic, data in topic_analysis.items()
+                                if data['questions_attempted'] > 0]
+            weak_topics = heapq.nsmallest(3, attempted_topics, key=lambda x: x[1]['score_percentage'])
+            time_consuming_topics = heapq.nlargest(3, attempted_topics, key=lambda x: x[1]['average_time_seconds'])
             
+            # One clock read so timestamp, date and time always agree
+            now = datetime.now()
             return {
                 'test_metadata': {
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': now.isoformat(),
                     'total_duration_seconds': sum(response_times),
-                    'test_date': datetime.now().strftime('%Y-%m-%d'),
-                    'test_time': datetime.now().strftime('%H:%M:%S'),
+                    'test_date': now.strftime('%Y-%m-%d'),
+                    'test_time': now.strftime('%H:%M:%S'),
                     'negative_marking_enabled': True,
                     'analysis_version': '3.0'
                 },
@@ -418,10 +575,11 @@ class PerformanceAnalyzer:
                 'performance_trends': {
                     'time_management_trend': time_trend,
                     'accuracy_trend': accuracy_trend,
-                    'consistency_score': self._calculate_consistency_score(response_times)
+                    'consistency_score': self._calculate_consistency_score(trend_stats)
                 },
                 'recommendations': self._generate_comprehensive_recommendations(
-                    performance_score, topic_analysis, avg_time, test_results, strategy_analysis
+                    performance_score, topic_analysis, avg_time,
+                    marking_analysis['answer_distribution'], strategy_analysis
                 ),
                 'grade_assessment': self._calculate_comprehensive_grade(
                     performance_score, avg_time, skipped_questions, total_questions, marking_analysis
@@ -433,32 +591,38 @@ class PerformanceAnalyzer:
             logger.error(traceback.format_exc())
             return {"error": f"Analysis failed: {str(e)}"}
     
-    def _analyze_topics_with_negative_marking(self, test_results: List[Dict], avg_time: float) -> Dict[str, Any]:
+    def _analyze_topics_with_negative_marking(self, test_results: List[Dict], avg_time: float,
+                                              columns: ResultColumns) -> Dict[str, Any]:
         """Analyze topic-wise performance with negative marking"""
-        topic_performance = defaultdict(lambda: {
-            'correct': 0, 'total': 0, 'times': [], 'skipped': 0, 'marks': 0.0
-        })
+        # One flat counter per field instead of a small dict per topic
+        total_by_topic = defaultdict(int)
+        correct_by_topic = defaultdict(int)
+        skipped_by_topic = defaultdict(int)
+        marks_by_topic = defaultdict(float)
+        times_by_topic = defaultdict(list)
+        correct_marks = self.MARKING_SCHEME['correct_marks']
+        incorrect_penalty = self.MARKING_SCHEME['incorrect_penalty']
         
-        for result in test_results:
+        for result, time_taken, is_correct, is_skipped in zip(test_results, *columns):
             try:
                 topic = self.categorize_question_topic(
                     result.get('question', ''),
                     result.get('pdf_reference', '')
                 )
                 
-                topic_performance[topic]['total'] += 1
+                total_by_topic[topic] += 1
                 
-                if result.get('is_skipped', False):
-                    topic_performance[topic]['skipped'] += 1
+                if is_skipped:
+                    skipped_by_topic[topic] += 1
                 else:
-                    time_taken = float(result.get('time_taken', 0))
-                    topic_performance[topic]['times'].append(time_taken)
+                    if time_taken is not None:
+                        times_by_topic[topic].append(time_taken)
                     
-                    if result.get('is_correct', False):
-                        topic_performance[topic]['correct'] += 1
-                        topic_performance[topic]['marks'] += 1.0
+                    if is_correct:
+                        correct_by_topic[topic] += 1
+                        marks_by_topic[topic] += correct_marks
                     else:
-                        topic_performance[topic]['marks'] -= 1/3
+                        marks_by_topic[topic] += incorrect_penalty
                         
             except Exception as e:
                 logger.warning(f"Error processing topic analysis for result: {e}")
@@ -466,24 +630,28 @@ class PerformanceAnalyzer:
         
         # Calculate topic metrics
         topic_analysis = {}
-        for topic, data in topic_performance.items():
+        for topic, total in total_by_topic.items():
             try:
-                attempted = data['total'] - data['skipped']
-                accuracy_rate = (data['correct'] / attempted * 100) if attempted > 0 else 0
-                avg_time_topic = statistics.mean(data['times']) if data['times'] else 0
-                topic_score = (data['marks'] / data['total']) * 100 if data['total'] > 0 else 0
+                skipped = skipped_by_topic[topic]
+                correct = correct_by_topic[topic]
+                marks = marks_by_topic[topic]
+                times = times_by_topic[topic]
+                attempted = total - skipped
+                accuracy_rate = (correct / attempted * 100) if attempted > 0 else 0
+                avg_time_topic = math.fsum(times) / len(times) if times else 0
+                topic_score = (marks / total) * 100 if total > 0 else 0
                 
                 topic_analysis[topic] = {
                     'accuracy_percentage': round(accuracy_rate, 2),
                     'score_percentage': round(max(-100, topic_score), 2),
-                    'marks_earned': round(data['marks'], 3),
-                    'questions_total': data['total'],
+                    'marks_earned': round(marks, 3),
+                    'questions_total': total,
                     'questions_attempted': attempted,
-                    'questions_skipped': data['skipped'],
-                    'correct_answers': data['correct'],
+                    'questions_skipped': skipped,
+                    'correct_answers': correct,
                     'average_time_seconds': round(avg_time_topic, 2),
                     'difficulty_assessment': self._assess_topic_difficulty(
-                        avg_time_topic, avg_time, accuracy_rate, data['marks'], data['total']
+                        avg_time_topic, avg_time, accuracy_rate, marks, total
                     )
                 }
             except Exception as e:
@@ -511,24 +679,70 @@ class PerformanceAnalyzer:
         else:
             return 'moderate'
     
-    def _analyze_time_trend(self, results: List[Dict]) -> Dict[str, Any]:
+    def _compute_trend_stats(self, columns: ResultColumns) -> TrendStats:
+        """Collect answered-question times and accuracy by thirds in one pass over the results"""
+        answered_times = []
+        answered_correct = []
+        response_times = []
+        count, mean, m2 = 0, 0.0, 0.0
+        
+        for time_val, is_correct, is_skipped in zip(*columns):
+            if is_skipped or time_val is None:
+                continue
+            answered_times.append(time_val)
+            answered_correct.append(is_correct)
+            
+            if 0 <= time_val <= 300:  # Reasonable time bounds
+                response_times.append(time_val)
+                # Welford's running mean and variance for the consistency score
+                count += 1
+                delta = time_val - mean
+                mean += delta / count
+                m2 += delta * (time_val - mean)
+        
+        # Split into thirds
+        third = len(answered_times) // 3
+        if third:
+            first_time = sum(answered_times[:third]) / third
+            last_time = sum(answered_times[-third:]) / third
+            first_accuracy = sum(answered_correct[:third]) / third * 100
+            last_accuracy = sum(answered_correct[-third:]) / third * 100
+        else:
+            first_time = last_time = first_accuracy = last_accuracy = 0.0
+        
+        return TrendStats(
+            response_times=response_times,
+            answered=len(answered_times),
+            first_third_time=first_time,
+            last_third_time=last_time,
+            first_third_accuracy=first_accuracy,
+            last_third_accuracy=last_accuracy,
+            mean_time=math.fsum(response_times) / count if count else 0.0,
+            stdev_time=math.sqrt(m2 / (count - 1)) if count > 1 else 0.0
+        )
+    
+    @staticmethod
+    def _median(values: List[float]) -> float:
+        """Median of a small list of floats"""
+        n = len(values)
+        if n == 0:
+            return 0
+        ordered = sorted(values)
+        mid = n // 2
+        return ordered[mid] if n % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+    
+    def _analyze_time_trend(self, stats: TrendStats) -> Dict[str, Any]:
         """Analyze time management trend with better error handling"""
         try:
-            non_skipped = [r for r in results if not r.get('is_skipped', False)]
-            if len(non_skipped) < 3:
+            if stats.answered < 3:
                 return {
                     "trend": "insufficient_data",
                     "description": "Not enough answered questions for trend analysis",
                     "confidence": "low"
                 }
             
-            # Split into thirds
-            third = len(non_skipped) // 3
-            first_third = non_skipped[:third]
-            last_third = non_skipped[-third:]
-            
-            avg_first = statistics.mean([float(r.get('time_taken', 0)) for r in first_third])
-            avg_last = statistics.mean([float(r.get('time_taken', 0)) for r in last_third])
+            avg_first = stats.first_third_time
+            avg_last = stats.last_third_time
             
             change_percentage = ((avg_last - avg_first) / avg_first) * 100 if avg_first > 0 else 0
             
@@ -556,22 +770,17 @@ class PerformanceAnalyzer:
             logger.warning(f"Time trend analysis failed: {e}")
             return {"trend": "analysis_failed", "description": "Could not analyze time trend"}
     
-    def _analyze_accuracy_trend(self, results: List[Dict]) -> Dict[str, Any]:
+    def _analyze_accuracy_trend(self, stats: TrendStats) -> Dict[str, Any]:
         """Analyze accuracy trend with improved reliability"""
         try:
-            non_skipped = [r for r in results if not r.get('is_skipped', False)]
-            if len(non_skipped) < 3:
+            if stats.answered < 3:
                 return {
                     "trend": "insufficient_data",
                     "description": "Not enough answered questions for accuracy trend analysis"
                 }
             
-            third = len(non_skipped) // 3
-            first_third = non_skipped[:third]
-            last_third = non_skipped[-third:]
-            
-            acc_first = sum(1 for r in first_third if r.get('is_correct', False)) / len(first_third) * 100
-            acc_last = sum(1 for r in last_third if r.get('is_correct', False)) / len(last_third) * 100
+            acc_first = stats.first_third_accuracy
+            acc_last = stats.last_third_accuracy
             
             change = acc_last - acc_first
             
@@ -598,18 +807,17 @@ class PerformanceAnalyzer:
             logger.warning(f"Accuracy trend analysis failed: {e}")
             return {"trend": "analysis_failed", "description": "Could not analyze accuracy trend"}
     
-    def _calculate_consistency_score(self, response_times: List[float]) -> float:
+    def _calculate_consistency_score(self, stats: TrendStats) -> float:
         """Calculate consistency score with better handling"""
         try:
-            if len(response_times) < 2:
+            if len(stats.response_times) < 2:
                 return 0.0
             
-            mean_time = statistics.mean(response_times)
+            mean_time = stats.mean_time
             if mean_time == 0:
                 return 0.0
             
-            std_dev = statistics.stdev(response_times)
-            coefficient_of_variation = std_dev / mean_time
+            coefficient_of_variation = stats.stdev_time / mean_time
             
             # Convert to 0-100 scale (lower CV = higher consistency)
             consistency = max(0, 100 - (coefficient_of_variation * 100))
@@ -621,7 +829,7 @@ class PerformanceAnalyzer:
     
     def _generate_comprehensive_recommendations(self, performance_score: float,
                                              topic_analysis: Dict, avg_time: float,
-                                             test_results: List[Dict],
+                                             answer_distribution: Dict[str, int],
                                              strategy_analysis: Dict) -> Dict[str, Any]:
         """Generate comprehensive recommendations"""
         try:
@@ -636,9 +844,12 @@ class PerformanceAnalyzer:
                 'long_term_goals': []
             }
             
-            # Difficulty level recommendation
-            attempt_rate = len([r for r in test_results if not r.get('is_skipped', False)]) / len(test_results)
+            # Rates from the counts the marking pass already produced
+            total_questions = answer_distribution['total_questions']
+            attempt_rate = (total_questions - answer_distribution['skipped_answers']) / total_questions
+            incorrect_rate = answer_distribution['incorrect_answers'] / total_questions
             
+            # Difficulty level recommendation
             if performance_score >= 75 and avg_time < 45 and attempt_rate > 0.8:
                 recommendations['next_difficulty_level'] = 'advanced'
             elif performance_score >= 50 and attempt_rate > 0.6:
@@ -647,62 +858,60 @@ class PerformanceAnalyzer:
                 recommendations['next_difficulty_level'] = 'easy'
             
             # Priority focus areas
-            weak_topics = sorted(
-                [(topic, data) for topic, data in topic_analysis.items()
+            weak_topics = heapq.nsmallest(
+                3,
+                [(topic, data['score_percentage'], data) for topic, data in topic_analysis.items()
                  if data['questions_attempted'] > 0],
-                key=lambda x: x[1]['score_percentage']
-            )[:3]
+                key=operator.itemgetter(1)
+            )
             
-            for topic, data in weak_topics:
-                priority_level = 'high' if data['score_percentage'] < 20 else 'medium'
-                study_hours = max(2, min(10, int(8 - data['score_percentage'] / 10)))
-                
-                recommendations['priority_focus_areas'].append({
+            recommendations['priority_focus_areas'] = [
+                {
                     'topic': topic,
-                    'score_percentage': data['score_percentage'],
-                    'priority_level': priority_level,
-                    'recommended_study_hours': study_hours,
-                    'focus_area': 'conceptual_understanding' if data['score_percentage'] < 0 else 'practice_and_speed'
-                })
+                    'score_percentage': score,
+                    'priority_level': 'high' if score < 20 else 'medium',
+                    'recommended_study_hours': max(2, min(10, int(8 - score / 10))),
+                    'focus_area': 'conceptual_understanding' if score < 0 else 'practice_and_speed'
+                }
+                for topic, score, _ in weak_topics
+            ]
             
             # Time management advice
             if avg_time > 50:
-                recommendations['time_management_advice'].extend([
+                recommendations['time_management_advice'] = [
                     "Practice time-bound problem solving daily",
                     "Learn elimination techniques for multiple choice questions",
                     "Set target time of 45 seconds per question for practice"
-                ])
+                ]
             
             # Risk management based on negative marking
-            incorrect_rate = sum(1 for r in test_results if not r.get('is_correct', False) and not r.get('is_skipped', False)) / len(test_results)
-            
             if incorrect_rate > 0.3:
-                recommendations['risk_management'].extend([
+                recommendations['risk_management'] = [
                     "High negative marking impact - practice confidence assessment",
                     "Learn to quickly identify questions outside your comfort zone",
                     "Develop systematic elimination strategies"
-                ])
+                ]
             
             # Study strategy
             if performance_score < 50:
-                recommendations['study_strategy'].extend([
+                recommendations['study_strategy'] = [
                     "Focus on fundamental concept building",
                     "Solve topic-wise questions before attempting mixed tests",
                     "Create concept summary sheets for quick revision"
-                ])
+                ]
             else:
-                recommendations['study_strategy'].extend([
+                recommendations['study_strategy'] = [
                     "Focus on advanced problem-solving techniques",
                     "Practice full-length mock tests regularly",
                     "Analyze and learn from mistake patterns"
-                ])
+                ]
             
             # Immediate actions
             if weak_topics:
                 strongest_weak = weak_topics[0][0]
-                recommendations['immediate_actions'].append(
+                recommendations['immediate_actions'] = [
                     f"Start intensive practice in {strongest_weak} - highest impact area"
-                )
+                ]
             
             # Long-term goals
             target_score = min(90, performance_score + 20)
@@ -758,19 +967,8 @@ class PerformanceAnalyzer:
             
             final_score = max(0, min(100, base_score + strategy_penalty + attempt_bonus + time_bonus))
             
-            # Determine grade and level
-            if final_score >= 85:
-                grade, level = 'A+', 'Excellent - GATE Ready'
-            elif final_score >= 75:
-                grade, level = 'A', 'Very Good - Strong GATE Potential'
-            elif final_score >= 65:
-                grade, level = 'B+', 'Good - Focused Improvement Needed'
-            elif final_score >= 50:
-                grade, level = 'B', 'Average - Significant Preparation Required'
-            elif final_score >= 35:
-                grade, level = 'C', 'Below Average - Extensive Preparation Needed'
-            else:
-                grade, level = 'D', 'Poor - Fundamental Revision Required'
+            # Determine grade and level (final_score is clamped to 0-100 above)
+            grade, level = self.GRADE_TABLE[bisect.bisect_right(self.GRADE_THRESHOLDS, final_score) - 1]
             
             # GATE readiness assessment
             gate_readiness = self._assess_gate_readiness(final_score, marking_analysis, avg_time)
@@ -831,56 +1029,70 @@ class PerformanceAnalyzer:
             logger.error(f"GATE readiness assessment failed: {e}")
             return {"error": "Failed to assess GATE readiness"}
     
+    @staticmethod
+    def _apply_rules(efficiency: Dict, rules: Tuple) -> List[str]:
+        """Messages of every (metric, default, comparison, threshold, message) rule that holds"""
+        return [message for metric, default, compare, threshold, message in rules
+                if compare(efficiency.get(metric, default), threshold)]
+    
     def _identify_strengths(self, marking_analysis: Dict) -> List[str]:
         """Identify student strengths"""
-        strengths = []
-        efficiency = marking_analysis.get('efficiency_metrics', {})
-        
-        if efficiency.get('attempt_rate', 0) > 80:
-            strengths.append("Good attempt rate - not overly cautious")
-        if efficiency.get('correct_attempt_ratio', 0) > 70:
-            strengths.append("High accuracy on attempted questions")
-        if efficiency.get('negative_impact', 100) < 10:
-            strengths.append("Effective negative marking management")
-        
-        return strengths
+        return self._apply_rules(marking_analysis.get('efficiency_metrics', {}), self.STRENGTH_RULES)
     
     def _identify_gaps(self, marking_analysis: Dict) -> List[str]:
         """Identify critical gaps"""
-        gaps = []
-        efficiency = marking_analysis.get('efficiency_metrics', {})
-        
-        if efficiency.get('negative_impact', 0) > 15:
-            gaps.append("High negative marking impact")
-        if efficiency.get('attempt_rate', 100) < 60:
-            gaps.append("Low attempt rate - too cautious")
-        if efficiency.get('correct_attempt_ratio', 100) < 50:
-            gaps.append("Low accuracy on attempted questions")
-        
-        return gaps
+        return self._apply_rules(marking_analysis.get('efficiency_metrics', {}), self.GAP_RULES)
     
     def _get_grade_explanation(self, grade: str, score: float) -> str:
         """Get explanation for the assigned grade"""
-        explanations = {
-            'A+': "Outstanding performance with excellent negative marking strategy",
-            'A': "Very good performance with effective test-taking approach",
-            'B+': "Good performance but room for improvement in strategy or content",
-            'B': "Average performance requiring focused preparation",
-            'C': "Below average performance requiring significant improvement",
-            'D': "Poor performance requiring fundamental concept revision"
-        }
-        return explanations.get(grade, "Performance assessment completed")
+        return self.GRADE_EXPLANATIONS.get(grade, "Performance assessment completed")
 
 class TestInterface:
     """Optimized main test interface with enhanced error handling"""
     
+    GEMINI_MODEL = 'gemini-2.5-flash-lite'
+    
+    ANSWER_OPTIONS = frozenset(('A', 'B', 'C', 'D'))
+    VALID_ANSWERS = ANSWER_OPTIONS | {'SKIP'}
+    
+    # Static console text, built once instead of on every question
+    BANNER = "=" * 80
+    SEPARATOR = "-" * 80
+    CORRECT_FEEDBACK = "✅ Correct! (+1 mark) | Time: {:.1f}s"
+    INCORRECT_FEEDBACK = "❌ Incorrect (-1/3 mark) | Correct: {} | Time: {:.1f}s"
+    
+    REPORT_METADATA = {
+        'report_version': '3.0',
+        'report_type': 'gate_practice_test_with_negative_marking',
+        'analysis_engine': 'optimized_performance_analyzer'
+    }
+    
+    FEEDBACK_PROMPT = """
+You are an expert GATE exam coach. Provide encouraging, specific feedback based on this performance:
+
+Performance Summary:
+- Score: {score}% (with negative marking)
+- Accuracy: {accuracy}%
+- Grade: {grade} ({level})
+- Time Management: {avg_time:.1f}s per question
+
+Weak Areas: {weak_areas}
+
+Provide personalized, encouraging feedback in 150-200 words focusing on:
+1. Positive reinforcement for strengths
+2. Specific improvement areas
+3. Strategy advice for negative marking
+4. Motivational closing
+"""
+    
     def __init__(self):
         self.current_question = 0
         self.test_results = []
         self.analyzer = PerformanceAnalyzer()
         self.start_time = None
         self.gemini_model = None
-        self.session_id = f"gate_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self._gemini_validated = False  # Set by the first successful Gemini call
+        self.session_id = f"gate_test_{datetime.now():%Y%m%d_%H%M%S}"
     
     def setup_gemini(self) -> bool:
         """Setup Gemini AI with improved error handling"""
@@ -889,26 +1101,19 @@ class TestInterface:
             return False
         
         try:
-            # Load environment variables
-            if DOTENV_AVAILABLE:
-                load_dotenv()
+            import google.generativeai as genai
             
-            api_key = os.getenv('GEMINI_API_KEY')
+            api_key = _get_api_key()
             if not api_key:
                 logger.warning("GEMINI_API_KEY not found in environment variables")
                 return False
             
             genai.configure(api_key=api_key)
-            self.gemini_model = genai.GenerativeModel('gemini-2.5-flash-lite')
+            self.gemini_model = genai.GenerativeModel(self.GEMINI_MODEL)
             
-            # Test the model with a simple query
-            test_response = self.gemini_model.generate_content("Test connection")
-            if test_response and test_response.text:
-                logger.info("Gemini AI successfully initialized")
-                return True
-            else:
-                logger.warning("Gemini AI test failed")
-                return False
+            # No test query here: the first feedback request validates the connection
+            logger.info("Gemini AI configured")
+            return True
                 
         except Exception as e:
             logger.warning(f"Failed to setup Gemini AI: {e}")
@@ -917,9 +1122,9 @@ class TestInterface:
     def display_question(self, question_data: Dict, question_num: int, total_questions: int):
         """Display question with improved formatting and validation"""
         try:
-            print("\n" + "="*80)
+            print(f"\n{self.BANNER}")
             print(f"Question {question_num}/{total_questions} | Session: {self.session_id}")
-            print("="*80)
+            print(self.BANNER)
             
             question_text = question_data.get('question', 'Question text not available')
             print(f"\n📝 {question_text}")
@@ -936,7 +1141,7 @@ class TestInterface:
             if pdf_ref:
                 print(f"\n📖 Reference: {pdf_ref}")
             
-            print("\n" + "-"*80)
+            print(f"\n{self.SEPARATOR}")
             
         except Exception as e:
             logger.error(f"Error displaying question: {e}")
@@ -958,31 +1163,28 @@ class TestInterface:
         try:
             # Get user input with timeout handling
             answer = input().strip().upper()
-            elapsed_time = timer.stop()
-            
-            # Validate input
-            valid_answers = {'A', 'B', 'C', 'D', 'SKIP'}
-            if answer in valid_answers:
-                return answer, elapsed_time
-            else:
-                print(f"⚠️ Invalid input '{answer}'. Marking as skipped.")
-                return 'SKIP', elapsed_time
-                
         except KeyboardInterrupt:
-            timer.stop()
             print("\n\n⚠️ Test interrupted by user.")
             return None, 0
         except EOFError:
-            timer.stop()
             print("\n\n⚠️ Input stream ended. Marking as skipped.")
             return 'SKIP', timer.duration
         except Exception as e:
-            timer.stop()
             logger.error(f"Error getting user input: {e}")
             print(f"\n⚠️ Input error. Marking as skipped.")
             return 'SKIP', timer.duration
+        finally:
+            # Exactly one stop per question, whichever way input ended
+            elapsed_time = timer.stop()
+        
+        # Validate input
+        if answer in self.VALID_ANSWERS:
+            return answer, elapsed_time
+        print(f"⚠️ Invalid input '{answer}'. Marking as skipped.")
+        return 'SKIP', elapsed_time
     
-    def conduct_test(self, questions: List[Dict], time_per_question: int = 1) -> List[Dict]:
+    def conduct_test(self, questions: List[Dict], time_per_question: int = 1,
+                     interactive: bool = True) -> List[Dict]:
         """Conduct test with comprehensive error handling and progress tracking"""
         if not questions:
             print("❌ No questions available for the test")
@@ -993,77 +1195,97 @@ class TestInterface:
         print(f"⏰ Time per question: {time_per_question} minute(s)")
         print(f"📝 Marking Scheme: +1 for correct, -1/3 for incorrect, 0 for skip")
         print(f"🔄 Session ID: {self.session_id}")
-        print(f"\nPress Enter to start...")
         
-        try:
-            input()
-        except (KeyboardInterrupt, EOFError):
-            print("\n❌ Test cancelled by user")
-            return []
+        # Non-interactive runs skip pauses, progress and per-question feedback so answers can be piped in
+        if interactive:
+            print(f"\nPress Enter to start...")
+            try:
+                input()
+            except (KeyboardInterrupt, EOFError):
+                print("\n❌ Test cancelled by user")
+                return []
         
         self.start_time = datetime.now()
         test_results = []
-        
-        for i, question in enumerate(questions, 1):
-            try:
-                # Progress indicator
-                progress = (i-1) / len(questions) * 100
-                print(f"\n📊 Progress: {progress:.1f}% ({i-1}/{len(questions)} completed)")
-                
-                self.display_question(question, i, len(questions))
-                
-                timer = TestTimer(time_per_question)
-                user_input = self.get_user_answer(timer)
-                
-                if user_input is None:  # User interrupted
-                    print("\n⚠️ Test interrupted. Saving current progress...")
-                    break
-                
-                user_answer, time_taken = user_input
-                
-                # Validate question data
-                correct_answer = question.get('correct_answer', 'A')
-                if correct_answer not in ['A', 'B', 'C', 'D']:
-                    logger.warning(f"Invalid correct answer for question {i}: {correct_answer}")
-                    correct_answer = 'A'
-                
-                # Record result with comprehensive data
-                result = {
-                    'question_number': i,
-                    'question': question.get('question', ''),
-                    'correct_answer': correct_answer,
-                    'user_answer': user_answer,
-                    'is_correct': user_answer == correct_answer,
-                    'is_skipped': user_answer == 'SKIP',
-                    'time_taken': time_taken,
-                    'explanation': question.get('explanation', ''),
-                    'pdf_reference': question.get('pdf_reference', ''),
-                    'timestamp': datetime.now().isoformat(),
-                    'options': question.get('options', [])
-                }
-                
-                test_results.append(result)
-                
-                # Immediate feedback
-                self._show_immediate_feedback(result, question.get('explanation', ''))
-                
-                # Brief pause before next question (except for last question)
-                if i < len(questions):
-                    print(f"\nPress Enter for next question (or Ctrl+C to end test)...")
-                    try:
-                        input()
-                    except (KeyboardInterrupt, EOFError):
-                        print("\n⚠️ Test ended by user")
+        # Closed on every exit, including Ctrl+C or SystemExit escaping the loop
+        with self._open_progress_log() as progress_log:
+            for i, question in enumerate(questions, 1):
+                try:
+                    # Progress indicator
+                    if interactive:
+                        progress = (i-1) / len(questions) * 100
+                        print(f"\n📊 Progress: {progress:.1f}% ({i-1}/{len(questions)} completed)")
+                    
+                    self.display_question(question, i, len(questions))
+                    
+                    timer = TestTimer(time_per_question)
+                    user_input = self.get_user_answer(timer)
+                    
+                    if user_input is None:  # User interrupted
+                        print("\n⚠️ Test interrupted. Saving current progress...")
                         break
-                        
-            except Exception as e:
-                logger.error(f"Error processing question {i}: {e}")
-                print(f"⚠️ Error with question {i}. Skipping...")
-                continue
+                    
+                    user_answer, time_taken = user_input
+                    
+                    # Validate question data
+                    correct_answer = question.get('correct_answer', 'A')
+                    if correct_answer not in self.ANSWER_OPTIONS:
+                        logger.warning(f"Invalid correct answer for question {i}: {correct_answer}")
+                        correct_answer = 'A'
+                    
+                    # Record result with comprehensive data
+                    result = {
+                        'question_number': i,
+                        'question': question.get('question', ''),
+                        'correct_answer': correct_answer,
+                        'user_answer': user_answer,
+                        'is_correct': user_answer == correct_answer,
+                        'is_skipped': user_answer == 'SKIP',
+                        'time_taken': time_taken,
+                        'explanation': question.get('explanation', ''),
+                        'pdf_reference': question.get('pdf_reference', ''),
+                        'timestamp': datetime.now().isoformat(),
+                        'options': question.get('options', [])
+                    }
+                    
+                    test_results.append(result)
+                    if progress_log:
+                        progress_log.write(json.dumps(result, ensure_ascii=False) + '\n')
+                    
+                    if not interactive:
+                        continue
+                    
+                    # Immediate feedback
+                    self._show_immediate_feedback(result, question.get('explanation', ''))
+                    
+                    # Brief pause before next question (except for last question)
+                    if i < len(questions):
+                        print(f"\nPress Enter for next question (or Ctrl+C to end test)...")
+                        try:
+                            input()
+                        except (KeyboardInterrupt, EOFError):
+                            print("\n⚠️ Test ended by user")
+                            break
+                            
+                except Exception as e:
+                    logger.error(f"Error processing question {i}: {e}")
+                    print(f"⚠️ Error with question {i}. Skipping...")
+                    continue
         
         print(f"\n🏁 Test completed! Processed {len(test_results)} questions.")
         return test_results
     
+    def _open_progress_log(self):
+        """Open a line-buffered JSONL log so answered questions survive a crash mid-test"""
+        try:
+            results_dir = Path('test_results')
+            results_dir.mkdir(exist_ok=True)
+            return open(results_dir / f"{self.session_id}.jsonl", 'a', encoding='utf-8', buffering=1)
+        except OSError as e:
+            logger.warning(f"Progress log unavailable: {e}")
+            # Enters as None, so the caller's "if progress_log" check skips logging
+            return contextlib.nullcontext()
+    
     def _show_immediate_feedback(self, result: Dict, explanation: str):
         """Show immediate feedback after each question"""
         try:
@@ -1071,9 +1293,9 @@ class TestInterface:
                 print(f"⏭️ Question skipped")
                 print(f"✅ Correct answer: {result['correct_answer']}")
             elif result['is_correct']:
-                print(f"✅ Correct! (+1 mark) | Time: {result['time_taken']:.1f}s")
+                print(self.CORRECT_FEEDBACK.format(result['time_taken']))
             else:
-                print(f"❌ Incorrect (-1/3 mark) | Correct: {result['correct_answer']} | Time: {result['time_taken']:.1f}s")
+                print(self.INCORRECT_FEEDBACK.format(result['correct_answer'], result['time_taken']))
             
             if explanation and len(explanation.strip()) > 0:
                 print(f"💡 Explanation: {explanation}")
@@ -1091,33 +1313,36 @@ class TestInterface:
             grade_info = analysis.get('grade_assessment', {})
             problem_areas = analysis.get('problem_areas', {})
             
-            prompt = f"""
-You are an expert GATE exam coach. Provide encouraging, specific feedback based on this performance:
-
-Performance Summary:
-- Score: {overall_perf.get('score_percentage', 0)}% (with negative marking)
-- Accuracy: {overall_perf.get('accuracy_percentage', 0)}%
-- Grade: {grade_info.get('letter_grade', 'N/A')} ({grade_info.get('performance_level', 'N/A')})
-- Time Management: {overall_perf.get('average_time_per_question_seconds', 0):.1f}s per question
-
-Weak Areas: {[topic.get('topic', '') for topic in problem_areas.get('weakest_topics', [])[:2]]}
-
-Provide personalized, encouraging feedback in 150-200 words focusing on:
-1. Positive reinforcement for strengths
-2. Specific improvement areas
-3. Strategy advice for negative marking
-4. Motivational closing
-"""
+            prompt = self.FEEDBACK_PROMPT.format_map({
+                'score': overall_perf.get('score_percentage', 0),
+                'accuracy': overall_perf.get('accuracy_percentage', 0),
+                'grade': grade_info.get('letter_grade', 'N/A'),
+                'level': grade_info.get('performance_level', 'N/A'),
+                'avg_time': overall_perf.get('average_time_per_question_seconds', 0),
+                'weak_areas': [topic.get('topic', '') for topic in problem_areas.get('weakest_topics', [])[:2]]
+            })
+            
+            cache_key = ExactResponseCache.make_key(self.GEMINI_MODEL, 'feedback', prompt)
+            cached_feedback = FEEDBACK_CACHE.get(cache_key)
+            if cached_feedback:
+                logger.info("Using cached AI feedback")
+                return cached_feedback
             
             response = self.gemini_model.generate_content(prompt)
+            self._gemini_validated = True
             if response and response.text and len(response.text.strip()) > 50:
-                return response.text.strip()
+                feedback = response.text.strip()
+                FEEDBACK_CACHE.set(cache_key, feedback)
+                return feedback
             else:
                 logger.warning("AI response too short or empty, using basic feedback")
                 return self._generate_basic_feedback(analysis)
                 
         except Exception as e:
             logger.warning(f"AI feedback generation failed: {e}")
+            if not self._gemini_validated:
+                # Never reached Gemini successfully; treat it as unavailable from here on
+                self.gemini_model = None
             return self._generate_basic_feedback(analysis)
     
     def _generate_basic_feedback(self, analysis: Dict) -> str:
@@ -1174,9 +1399,7 @@ Provide personalized, encouraging feedback in 150-200 words focusing on:
                     'report_generated_at': datetime.now().isoformat(),
                     'session_id': self.session_id,
                     'test_duration': test_duration,
-                    'report_version': '3.0',
-                    'report_type': 'gate_practice_test_with_negative_marking',
-                    'analysis_engine': 'optimized_performance_analyzer'
+                    **self.REPORT_METADATA
                 },
                 'ai_feedback': {
                     'personalized_message': ai_feedback,
@@ -1202,90 +1425,97 @@ Provide personalized, encouraging feedback in 150-200 words focusing on:
                 print(f"\n❌ Error in report: {json_report['error']}")
                 return
             
-            print(f"\n📊 GATE PRACTICE TEST - PERFORMANCE SUMMARY (Negative Marking)")
-            print("="*80)
+            # Collect the report and write it to stdout in one call
+            lines = []
+            lines.append(f"\n📊 GATE PRACTICE TEST - PERFORMANCE SUMMARY (Negative Marking)")
+            lines.append(self.BANNER)
             
             # Session info
             metadata = json_report.get('report_metadata', {})
-            print(f"🔍 Session: {metadata.get('session_id', 'N/A')}")
-            print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"⏱️ Duration: {metadata.get('test_duration', 'N/A')}")
+            lines.append(f"🔍 Session: {metadata.get('session_id', 'N/A')}")
+            # Show when the report was generated rather than reading the clock again
+            generated_at = metadata.get('report_generated_at')
+            report_date = generated_at[:19].replace('T', ' ') if generated_at else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            lines.append(f"📅 Date: {report_date}")
+            lines.append(f"⏱️ Duration: {metadata.get('test_duration', 'N/A')}")
             
             # Main performance metrics
             overall = json_report.get('overall_performance', {})
             grade = json_report.get('grade_assessment', {})
             marking = json_report.get('negative_marking_analysis', {}).get('marking_summary', {})
             
-            print(f"\n🎯 OVERALL PERFORMANCE")
-            print(f"Grade: {grade.get('letter_grade', 'N/A')} ({grade.get('performance_level', 'N/A')})")
-            print(f"Final Score: {overall.get('score_percentage', 0)}% (with negative marking)")
-            print(f"Raw Accuracy: {overall.get('accuracy_percentage', 0)}%")
-            print(f"Marks: {marking.get('total_marks_earned', 0):.2f}/{marking.get('maximum_possible_marks', 0)}")
-            print(f"Average Time: {overall.get('average_time_per_question_seconds', 0):.1f}s per question")
+            lines.append(f"\n🎯 OVERALL PERFORMANCE")
+            lines.append(f"Grade: {grade.get('letter_grade', 'N/A')} ({grade.get('performance_level', 'N/A')})")
+            lines.append(f"Final Score: {overall.get('score_percentage', 0)}% (with negative marking)")
+            lines.append(f"Raw Accuracy: {overall.get('accuracy_percentage', 0)}%")
+            lines.append(f"Marks: {marking.get('total_marks_earned', 0):.2f}/{marking.get('maximum_possible_marks', 0)}")
+            lines.append(f"Average Time: {overall.get('average_time_per_question_seconds', 0):.1f}s per question")
             
             # Negative marking analysis
-            print(f"\n💡 NEGATIVE MARKING IMPACT")
-            print(f"Positive Marks: +{marking.get('positive_marks', 0):.2f}")
-            print(f"Negative Marks: -{marking.get('negative_marks', 0):.2f}")
-            print(f"Net Score Impact: {marking.get('net_score_impact', 0):.2f}")
+            lines.append(f"\n💡 NEGATIVE MARKING IMPACT")
+            lines.append(f"Positive Marks: +{marking.get('positive_marks', 0):.2f}")
+            lines.append(f"Negative Marks: -{marking.get('negative_marks', 0):.2f}")
+            lines.append(f"Net Score Impact: {marking.get('net_score_impact', 0):.2f}")
             
             # Strategy analysis
             strategy = json_report.get('strategy_analysis', {})
             if strategy.get('current_performance'):
                 current = strategy['current_performance']
-                print(f"\n🎯 STRATEGY ANALYSIS")
-                print(f"Current Strategy: {current.get('strategy_type', 'N/A').replace('_', ' ').title()}")
+                lines.append(f"\n🎯 STRATEGY ANALYSIS")
+                lines.append(f"Current Strategy: {current.get('strategy_type', 'N/A').replace('_', ' ').title()}")
                 
                 alternatives = strategy.get('alternative_strategies', {})
                 if 'conservative' in alternatives:
                     conservative = alternatives['conservative']
-                    print(f"Conservative Alternative: {conservative.get('marks', 0):.2f} marks ({conservative.get('difference', 0):+.2f})")
+                    lines.append(f"Conservative Alternative: {conservative.get('marks', 0):.2f} marks ({conservative.get('difference', 0):+.2f})")
             
             # GATE readiness
             gate_readiness = grade.get('gate_readiness', {})
             if gate_readiness:
-                print(f"\n🚀 GATE READINESS ASSESSMENT")
+                lines.append(f"\n🚀 GATE READINESS ASSESSMENT")
                 readiness_level = gate_readiness.get('readiness_level', 'unknown').replace('_', ' ').title()
-                print(f"Readiness Level: {readiness_level}")
-                print(f"Estimated Preparation Time: {gate_readiness.get('estimated_preparation_time', 'N/A')}")
-                print(f"Confidence Score: {gate_readiness.get('confidence_score', 0):.1f}%")
+                lines.append(f"Readiness Level: {readiness_level}")
+                lines.append(f"Estimated Preparation Time: {gate_readiness.get('estimated_preparation_time', 'N/A')}")
+                lines.append(f"Confidence Score: {gate_readiness.get('confidence_score', 0):.1f}%")
             
             # Focus areas
             problem_areas = json_report.get('problem_areas', {})
             weak_topics = problem_areas.get('weakest_topics', [])
             if weak_topics:
-                print(f"\n🎯 PRIORITY FOCUS AREAS")
+                lines.append(f"\n🎯 PRIORITY FOCUS AREAS")
                 for i, topic in enumerate(weak_topics[:3], 1):
                     topic_name = topic.get('topic', 'Unknown').replace('_', ' ').title()
                     score = topic.get('score_percentage', 0)
                     accuracy = topic.get('accuracy_percentage', 0)
-                    print(f"{i}. {topic_name}: {score:.1f}% score, {accuracy:.1f}% accuracy")
+                    lines.append(f"{i}. {topic_name}: {score:.1f}% score, {accuracy:.1f}% accuracy")
             
             # Recommendations
             recommendations = json_report.get('recommendations', {})
             next_level = recommendations.get('next_difficulty_level', 'medium')
-            print(f"\n🔄 NEXT STEPS")
-            print(f"Recommended Difficulty: {next_level.upper()}")
+            lines.append(f"\n🔄 NEXT STEPS")
+            lines.append(f"Recommended Difficulty: {next_level.upper()}")
             
             # Risk management advice
             risk_advice = recommendations.get('risk_management', [])
             if risk_advice:
-                print(f"\n⚠️ RISK MANAGEMENT TIPS")
+                lines.append(f"\n⚠️ RISK MANAGEMENT TIPS")
                 for tip in risk_advice[:2]:
-                    print(f"• {tip}")
+                    lines.append(f"• {tip}")
             
             # AI Feedback
             ai_feedback = json_report.get('ai_feedback', {})
             if ai_feedback.get('personalized_message'):
-                print(f"\n🤖 PERSONALIZED FEEDBACK")
-                print(f"{ai_feedback['personalized_message']}")
-                print(f"(Generated by: {ai_feedback.get('generated_by', 'system')})")
+                lines.append(f"\n🤖 PERSONALIZED FEEDBACK")
+                lines.append(f"{ai_feedback['personalized_message']}")
+                lines.append(f"(Generated by: {ai_feedback.get('generated_by', 'system')})")
+            
+            sys.stdout.write("\n".join(lines) + "\n")
             
         except Exception as e:
             logger.error(f"Error displaying summary: {e}")
             print(f"\n❌ Error displaying summary report")
     
-    def save_json_results(self, test_results: List[Dict], json_report: Dict) -> str:
+    def save_json_results(self, test_results: List[Dict], json_report: Dict, pretty: bool = False) -> str:
         """Save results with comprehensive error handling and backup"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -1308,16 +1538,17 @@ Provide personalized, encouraging feedback in 150-200 words focusing on:
             results_dir = Path('test_results')
             results_dir.mkdir(exist_ok=True)
             
+            # Serialize before opening any file so an encoding error can't leave a truncated one
+            payload = _results_json_bytes(complete_results, pretty)
+            
             # Save main results file
             results_file = results_dir / f"gate_test_results_{timestamp}.json"
+            results_file.write_bytes(payload)
             
-            with open(results_file, 'w', encoding='utf-8') as f:
-                json.dump(complete_results, f, indent=2, ensure_ascii=False)
-            
-            # Create backup file
+            # Create backup file from the same bytes (a separate file, not a hard link,
+            # so an in-place edit of the results can't also change the backup)
             backup_file = results_dir / f"backup_gate_test_{timestamp}.json"
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(complete_results, f, indent=2, ensure_ascii=False)
+            backup_file.write_bytes(payload)
             
             logger.info(f"Results saved: {results_file}")
             logger.info(f"Backup created: {backup_file}")
@@ -1331,8 +1562,9 @@ Provide personalized, encouraging feedback in 150-200 words focusing on:
             # Emergency save to current directory
             try:
                 emergency_file = f"emergency_results_{timestamp}.json"
-                with open(emergency_file, 'w', encoding='utf-8') as f:
-                    json.dump({'test_results': test_results, 'error': str(e)}, f, indent=2)
+                # Stdlib json on purpose: the failure above may have come from orjson
+                emergency_payload = json.dumps({'test_results': test_results, 'error': str(e)})
+                Path(emergency_file).write_text(emergency_payload, encoding='utf-8')
                 logger.info(f"Emergency save completed: {emergency_file}")
                 return emergency_file
             except Exception as emergency_error:
@@ -1411,6 +1643,18 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         help="Return only JSON output without console summary"
     )
     
+    parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="Skip pauses and per-question feedback (answers read from stdin)"
+    )
+    
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent JSON output and saved result files (default: compact)"
+    )
+    
     parser.add_argument(
         "--no-save",
         action="store_true",
@@ -1425,6 +1669,9 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
     
     args = parser.parse_args()
     
+    # Machine-read JSON is compact unless indentation is asked for
+    json_format = {'indent': 2} if args.pretty else {'separators': (',', ':')}
+    
     # Set logging level
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -1435,7 +1682,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         if not valid_pdf_files:
             error_msg = "No valid PDF files found"
             if args.json_only:
-                print(json.dumps({"error": error_msg}, indent=2))
+                print(json.dumps({"error": error_msg}, **json_format))
             else:
                 print(f"❌ {error_msg}")
             return 1
@@ -1453,6 +1700,18 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
             else:
                 print("🔧 Using standard feedback (AI unavailable)")
         
+        # The question generator loads the whole Gemini stack, so only the CLI imports it
+        try:
+            from question_generator import generate_questions
+        except ImportError as e:
+            logger.error(f"Failed to import question_generator: {e}")
+            error_msg = "question_generator.py not found. Please ensure it's in the same directory."
+            if args.json_only:
+                print(json.dumps({"error": error_msg}, **json_format))
+            else:
+                print(f"❌ {error_msg}")
+            return 1
+        
         # Generate questions
         try:
             result = generate_questions(
@@ -1465,7 +1724,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
             error_msg = f"Question generation failed: {str(e)}"
             logger.error(error_msg)
             if args.json_only:
-                print(json.dumps({"error": error_msg}, indent=2))
+                print(json.dumps({"error": error_msg}, **json_format))
             else:
                 print(f"❌ {error_msg}")
             return 1
@@ -1473,7 +1732,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         if not result.get("success", False):
             error_msg = f"Failed to generate questions: {result.get('error', 'Unknown error')}"
             if args.json_only:
-                print(json.dumps({"error": error_msg}, indent=2))
+                print(json.dumps({"error": error_msg}, **json_format))
             else:
                 print(f"❌ {error_msg}")
             return 1
@@ -1482,7 +1741,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         if not questions:
             error_msg = "No questions were generated"
             if args.json_only:
-                print(json.dumps({"error": error_msg}, indent=2))
+                print(json.dumps({"error": error_msg}, **json_format))
             else:
                 print(f"❌ {error_msg}")
             return 1
@@ -1492,13 +1751,15 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         
         # Conduct the test
         test_start = datetime.now()
-        test_results = test_interface.conduct_test(questions, args.time_per_question)
+        test_results = test_interface.conduct_test(
+            questions, args.time_per_question, interactive=not args.non_interactive
+        )
         test_end = datetime.now()
         
         if not test_results:
             error_msg = "Test was not completed or no results generated"
             if args.json_only:
-                print(json.dumps({"error": error_msg}, indent=2))
+                print(json.dumps({"error": error_msg}, **json_format))
             else:
                 print(f"❌ {error_msg}")
             return 1
@@ -1517,7 +1778,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         if 'error' in analysis:
             error_msg = f"Performance analysis failed: {analysis['error']}"
             if args.json_only:
-                print(json.dumps({"error": error_msg}, indent=2))
+                print(json.dumps({"error": error_msg}, **json_format))
             else:
                 print(f"❌ {error_msg}")
             return 1
@@ -1527,7 +1788,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         
         # Output results based on format preference
         if args.json_only or args.output_format == "json":
-            print(json.dumps(json_report, indent=2, ensure_ascii=False))
+            print(json.dumps(json_report, ensure_ascii=False, **json_format))
         elif args.output_format == "console":
             test_interface.display_summary_report(json_report)
         else:  # both
@@ -1542,7 +1803,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
             if not args.json_only:
                 print(f"\n💾 Saving results...")
             
-            results_file = test_interface.save_json_results(test_results, json_report)
+            results_file = test_interface.save_json_results(test_results, json_report, pretty=args.pretty)
             if results_file:
                 if not args.json_only:
                     print(f"✅ Results saved to: {results_file}")
@@ -1575,7 +1836,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         if not args.json_only:
             print(f"\n⚠️ Test interrupted by user")
         else:
-            print(json.dumps({"error": "Test interrupted by user"}, indent=2))
+            print(json.dumps({"error": "Test interrupted by user"}, **json_format))
         return 1
     except Exception as e:
         error_msg = f"Unexpected error: {str(e)}"
@@ -1583,7 +1844,7 @@ Note: This version includes GATE-style negative marking (-1/3 for incorrect answ
         logger.error(traceback.format_exc())
         
         if args.json_only:
-            print(json.dumps({"error": error_msg}, indent=2))
+            print(json.dumps({"error": error_msg}, **json_format))
         else:
             print(f"❌ {error_msg}")
         return 1
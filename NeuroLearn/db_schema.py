@@ -0,0 +1,111 @@
+# Database schema setup. No app imports here: gunicorn's master runs init_db before forking
+# workers, and importing app.py there would build the whole app (model, caches, pools) pre-fork
+import json
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = 'gate_app.db'
+
+def init_db():
+    """Initialize the database with user and test_history tables"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    # Persistent file settings, applied once: 8KB pages (needs a VACUUM outside WAL mode), then WAL
+    if cursor.execute('PRAGMA page_size').fetchone()[0] != 8192:
+        cursor.execute('PRAGMA journal_mode=DELETE')
+        cursor.execute('PRAGMA page_size=8192')
+        cursor.execute('VACUUM')
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP
+        )
+    ''')
+    
+    # Login and register lookups use the indexes behind the UNIQUE constraints; drop the
+    # duplicate explicit ones older databases were created with
+    cursor.execute('DROP INDEX IF EXISTS idx_users_username')
+    cursor.execute('DROP INDEX IF EXISTS idx_users_email')
+    
+    # Test history table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS test_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            test_name TEXT,
+            total_questions INTEGER,
+            correct_answers INTEGER,
+            score_percentage REAL,
+            time_taken INTEGER,
+            difficulty TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    # Dashboard queries and the dashboard cache check all filter on user_id
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_test_history_user ON test_history(user_id)')
+    
+    # Per-question answers for each saved test
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS test_question_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            test_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            question_number INTEGER,
+            user_answer TEXT,
+            correct_answer TEXT,
+            is_correct INTEGER,
+            time_taken REAL,
+            FOREIGN KEY (test_id) REFERENCES test_history (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_test_question_history_test ON test_question_history(test_id)')
+    
+    # Background question generation jobs (result is the JSON response payload)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS generation_jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    conn.commit()
+    conn.close()
+    logger.info("Database initialized successfully")
+
+# Stored as the result of jobs that never finished, in the same shape as other failed job results
+INTERRUPTED_JOB_RESULT = json.dumps({
+    'success': False,
+    'error': 'Question generation was interrupted. Please try again.'
+})
+
+def fail_interrupted_jobs():
+    """Mark jobs left queued or running by a previous server process as failed"""
+    # Only safe before any worker starts: jobs run in-process, so none of these can still be alive
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        cursor = conn.execute(
+            "UPDATE generation_jobs SET status = 'failed', result = ?, updated_at = CURRENT_TIMESTAMP "
+            "WHERE status IN ('queued', 'running')",
+            (INTERRUPTED_JOB_RESULT,)
+        )
+    conn.close()
+    if cursor.rowcount:
+        logger.warning(f"Marked {cursor.rowcount} interrupted question generation jobs as failed")
@@ -0,0 +1,30 @@
+# Gunicorn configuration: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = os.getenv('NEUROLEARN_BIND', '0.0.0.0:5000')
+
+# Question generation spends most of its time waiting on the Gemini API, but PDF
+# parsing is CPU-bound and holds the GIL, so use threaded workers across processes
+# (gevent greenlets would serialize behind PDF parsing within a worker)
+worker_class = 'gthread'
+workers = int(os.getenv('NEUROLEARN_WORKERS', min(4, multiprocessing.cpu_count())))
+threads = int(os.getenv('NEUROLEARN_THREADS', 4))
+
+# Generating a full question series can take well over the default 30s
+timeout = int(os.getenv('NEUROLEARN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+# Create the database once here instead of in every worker at import time
+os.environ.setdefault('NEUROLEARN_SKIP_INIT', '1')
+
+def on_starting(server):
+    """Initialize the database in the master before any worker starts"""
+    # db_schema has no app imports, so the master doesn't load the app before forking workers
+    from db_schema import fail_interrupted_jobs, init_db
+    init_db()
+    fail_interrupted_jobs()
@@ -1,31 +1,87 @@
 import argparse
+import asyncio
+import contextlib
+import functools
+import itertools
 import os
+import random
+import tempfile
 import time
 import json
+import multiprocessing
 import re
 import logging
+import threading
 import google.generativeai as genai
-from PyPDF2 import PdfReader
+import pypdfium2 as pdfium
 import pdfplumber
-from nltk.tokenize import sent_tokenize
 from tqdm import tqdm
 from dotenv import load_dotenv
 import nltk
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, IO, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from response_cache import ExactResponseCache, SemanticResponseCache
+
+# Optional: Gemini Batch API client (google-genai SDK)
+try:
+    from google import genai as genai_batch
+    BATCH_API_AVAILABLE = True
+except ImportError:
+    BATCH_API_AVAILABLE = False
+
+# google-genai is kept out of requirments.txt: it needs websockets>=13, which conflicts with the pinned 12.0
+BATCH_API_MISSING_MESSAGE = "Gemini Batch API (--batch-api) requires the google-genai package: pip install google-genai"
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# The embedding model has its own per-model quota, separate from the generation models
+EMBEDDING_MODEL_INFO = {
+    'name': 'models/embedding-001',
+    'requests_per_minute': 100
+}
+
+def embed_text_for_cache(text: str) -> List[float]:
+    """Embed text with Gemini for semantic cache lookups"""
+    get_rate_limiter(EMBEDDING_MODEL_INFO).acquire()
+    result = genai.embed_content(
+        model=EMBEDDING_MODEL_INFO['name'],
+        content=text,
+        task_type='semantic_similarity'
+    )
+    return result['embedding']
+
+# Exact repeats (re-running the same PDF) skip both the model and the embedding call
+EXACT_CACHE = ExactResponseCache(
+    db_path=os.getenv('NEUROLEARN_CACHE_DB', 'question_cache.db'),
+    ttl_days=30
+)
+
+# Generated questions are stable for a given text, so keep them for a long time.
+# Entries are shared across PDFs so repeated or reworded passages hit; the high threshold
+# keeps merely related content (same subject, different material) from matching.
+QUESTION_CACHE = SemanticResponseCache(
+    db_path=os.getenv('NEUROLEARN_CACHE_DB', 'question_cache.db'),
+    threshold=0.97,
+    ttl_days=90,
+    embed_fn=embed_text_for_cache
+)
+
+@functools.lru_cache(maxsize=None)
 def download_nltk_data():
-    """Download required NLTK data with error handling"""
-    nltk_downloads = ['punkt', 'stopwords', 'wordnet', 'averaged_perceptron_tagger']
-    for item in nltk_downloads:
+    """Download required NLTK data with error handling (checked once per process)"""
+    # Only the stopword list is used (fallback concepts); sentence splitting and tagging are not
+    nltk_downloads = {
+        'stopwords': 'corpora/stopwords',
+    }
+    for item, resource_path in nltk_downloads.items():
         try:
-            nltk.data.find(f'tokenizers/{item}')
+            nltk.data.find(resource_path)
         except LookupError:
             try:
                 logger.info(f"Downloading NLTK {item}...")
@@ -54,27 +110,37 @@ def configure_gemini_with_retry():
         {
             'name': 'gemini-2.5-flash-lite',
             'description': 'Gemini 1.5 Pro - Best for complex reasoning',
-            'rate_limit_delay': 1.0
+            'rate_limit_delay': 1.0,
+            'max_concurrency': 8,
+            'requests_per_minute': 15
         },
         {
             'name': 'gemini-1.5-flash', 
             'description': 'Gemini 1.5 Flash - Faster responses',
-            'rate_limit_delay': 2.0
+            'rate_limit_delay': 2.0,
+            'max_concurrency': 4,
+            'requests_per_minute': 15
         },
         {
             'name': 'gemini-pro',
             'description': 'Gemini Pro - Reliable baseline',
-            'rate_limit_delay': 1.5
+            'rate_limit_delay': 1.5,
+            'max_concurrency': 4,
+            'requests_per_minute': 60
         },
         {
             'name': 'gemini-1.0-pro',
             'description': 'Gemini 1.0 Pro - Legacy fallback',
-            'rate_limit_delay': 2.0
+            'rate_limit_delay': 2.0,
+            'max_concurrency': 2,
+            'requests_per_minute': 15
         },
         {
             'name':'gemini-2.5',
             'description':"Gemini 2.5 pro",
-            'rate_limit_delay':1
+            'rate_limit_delay':1,
+            'max_concurrency': 4,
+            'requests_per_minute':5
         }
     ]
     
@@ -136,40 +202,242 @@ def configure_gemini_with_retry():
     
     raise ValueError("All Gemini models failed to initialize. Check your API key, quota, and internet connection.")
 
-def advanced_pdf_extraction(file_path: str) -> str:
-    """Enhanced PDF text extraction with multiple methods and error handling"""
+# Process-wide model handle, so requests don't repeat configuration and the test call
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+def get_gemini_model():
+    """Return the shared (model, model_info) pair, configuring Gemini on first use"""
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_model_lock:
+            if _gemini_model is None:
+                _gemini_model = configure_gemini_with_retry()
+    return _gemini_model
+
+# Every async Gemini call runs on one long-lived loop: google-generativeai caches its aio client
+# process-wide, and that client stays bound to the first event loop that uses it
+_async_loop = None
+_async_loop_pid = None
+_async_loop_lock = threading.Lock()
+
+def get_async_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide background event loop, starting its thread on first use"""
+    global _async_loop, _async_loop_pid
+    if _async_loop is None or _async_loop_pid != os.getpid():
+        with _async_loop_lock:
+            # A forked child inherits the loop object but not the thread running it
+            if _async_loop is None or _async_loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='gemini-async-loop', daemon=True).start()
+                _async_loop, _async_loop_pid = loop, os.getpid()
+    return _async_loop
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result (callable from any thread)"""
+    return asyncio.run_coroutine_threadsafe(coro, get_async_loop()).result()
+
+class TokenBucket:
+    """Client-side request rate limiter shared by all calls to one model.
+    
+    Refills at requests_per_minute / 60 tokens per second up to a full minute's quota, and
+    halves its rate for a cool-down period whenever the API reports a 429.
+    """
+    
+    def __init__(self, requests_per_minute: float, penalty_seconds: float = 30.0):
+        self.base_rate = requests_per_minute / 60.0
+        self.rate = self.base_rate
+        self.capacity = float(requests_per_minute)
+        self.tokens = self.capacity
+        self.penalty_seconds = penalty_seconds
+        self.penalty_until = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            if self.penalty_until and now >= self.penalty_until:
+                self.rate = self.base_rate
+                self.penalty_until = 0.0
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: each waiter reserves its own slot, so callers queue fairly
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+    
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be sent"""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+    
+    def penalize(self):
+        """Halve the request rate for a while after the API rejects a request for quota"""
+        with self._lock:
+            self.rate = max(self.rate / 2, self.base_rate / 8)
+            self.penalty_until = time.monotonic() + self.penalty_seconds
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model_info: Dict) -> TokenBucket:
+    """Return the process-wide rate limiter for a model"""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model_info['name'])
+        if limiter is None:
+            limiter = TokenBucket(model_info.get('requests_per_minute', 15))
+            _rate_limiters[model_info['name']] = limiter
+        return limiter
+
+# PDFs with at least this many pages are extracted across worker processes
+PARALLEL_PAGE_THRESHOLD = 8
+
+# pdfminer issues many small seeks and reads; a large buffer turns them into a few big reads
+PDF_READ_BUFFER_SIZE = 1 << 20
+
+# One page-extraction pool per process, started with spawn: forking a threaded web worker can deadlock
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+def get_page_pool() -> ProcessPoolExecutor:
+    """Return the shared page-extraction process pool, creating it on first use"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+        return _page_pool
+
+def discard_page_pool():
+    """Drop a broken page-extraction pool so the next large PDF starts a fresh one"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False, cancel_futures=True)
+            _page_pool = None
+
+# Per-worker-process pdfplumber handle, so each worker opens the PDF only once.
+# Keyed by (path, mtime) since pool workers outlive a single extraction
+_worker_pdf_key = None
+_worker_pdf_file = None
+_worker_pdf = None
+
+def _extract_pdfplumber_page_text(page: Any, page_num: int) -> str:
+    """Extract layout text and tables from a single pdfplumber page"""
+    # Collect parts and join once instead of repeated string concatenation
+    parts = []
+    try:
+        # Extract text with layout preservation
+        page_text = page.extract_text(layout=True, x_tolerance=2, y_tolerance=2)
+        if page_text and page_text.strip():
+            parts.append(f"\n=== Page {page_num + 1} ===\n{page_text}\n")
+        
+        # Extract tables separately if present
+        tables = page.extract_tables()
+        for table_idx, table in enumerate(tables):
+            if table and len(table) > 0:
+                parts.append(f"\n[Table {table_idx + 1} - Page {page_num + 1}]\n")
+                for row in table:
+                    if row and any(cell for cell in row):
+                        clean_row = [str(cell).strip() if cell else "" for cell in row]
+                        parts.append(" | ".join(clean_row) + "\n")
+                parts.append("\n")
+                
+    except Exception as page_error:
+        logger.warning(f"Error processing page {page_num + 1}: {page_error}")
+    
+    return "".join(parts)
+
+def _extract_pdfplumber_page_worker(args: tuple) -> str:
+    """Worker process entry point: extract one page, reusing the worker's open PDF"""
+    global _worker_pdf_key, _worker_pdf_file, _worker_pdf
+    file_path, file_mtime, page_num = args
+    
+    if _worker_pdf_key != (file_path, file_mtime):
+        if _worker_pdf is not None:
+            _worker_pdf.close()
+            _worker_pdf_file.close()
+        _worker_pdf_file = open(file_path, 'rb', buffering=PDF_READ_BUFFER_SIZE)
+        _worker_pdf = pdfplumber.open(_worker_pdf_file)
+        _worker_pdf_key = (file_path, file_mtime)
+    
+    return _extract_pdfplumber_page_text(_worker_pdf.pages[page_num], page_num)
+
+# Documents with fewer words than this can't support a question series; skip them before any API work
+MIN_DOCUMENT_WORDS = 50
+WORD_PATTERN = re.compile(r'\S+')
+
+def count_words_up_to(text: str, limit: int) -> int:
+    """Count words in text, stopping at limit instead of splitting the whole document"""
+    return sum(1 for _ in itertools.islice(WORD_PATTERN.finditer(text), limit))
+
+def get_pdf_source_name(pdf_source: Union[str, IO[bytes]]) -> str:
+    """Display name for a PDF given as a path or an in-memory file object"""
+    if isinstance(pdf_source, str):
+        return pdf_source
+    return getattr(pdf_source, 'name', None) or '<in-memory PDF>'
+
+def advanced_pdf_extraction(pdf_source: Union[str, IO[bytes]]) -> str:
+    """Enhanced PDF text extraction with multiple methods and error handling.
+    
+    Accepts either a file path or a binary file-like object (e.g. an uploaded file in a BytesIO).
+    """
+    file_path = get_pdf_source_name(pdf_source)
+    is_path = isinstance(pdf_source, str)
     logger.info(f"Processing PDF: {file_path}")
     
-    if not os.path.exists(file_path):
+    if is_path and not os.path.exists(file_path):
         raise FileNotFoundError(f"PDF file not found: {file_path}")
     
     extracted_text = ""
     
     # Method 1: Try pdfplumber first (best for complex layouts)
     try:
-        with pdfplumber.open(file_path) as pdf:
+        if is_path:
+            pdf_file_context = open(file_path, 'rb', buffering=PDF_READ_BUFFER_SIZE)
+        else:
+            pdf_source.seek(0)
+            pdf_file_context = contextlib.nullcontext(pdf_source)
+        
+        with pdf_file_context as pdf_file, pdfplumber.open(pdf_file) as pdf:
             logger.info(f"Using pdfplumber for {file_path}")
-            for page_num, page in enumerate(pdf.pages):
+            num_pages = len(pdf.pages)
+            
+            # Worker processes reopen the PDF by path, so in-memory sources are extracted serially
+            if is_path and num_pages >= PARALLEL_PAGE_THRESHOLD:
+                # Layout analysis is CPU-bound pure Python, so spread pages across cores
+                page_texts = None
                 try:
-                    # Extract text with layout preservation
-                    page_text = page.extract_text(layout=True, x_tolerance=2, y_tolerance=2)
-                    if page_text and page_text.strip():
-                        extracted_text += f"\n=== Page {page_num + 1} ===\n{page_text}\n"
-                    
-                    # Extract tables separately if present
-                    tables = page.extract_tables()
-                    for table_idx, table in enumerate(tables):
-                        if table and len(table) > 0:
-                            table_text = f"\n[Table {table_idx + 1} - Page {page_num + 1}]\n"
-                            for row in table:
-                                if row and any(cell for cell in row):
-                                    clean_row = [str(cell).strip() if cell else "" for cell in row]
-                                    table_text += " | ".join(clean_row) + "\n"
-                            extracted_text += table_text + "\n"
-                            
-                except Exception as page_error:
-                    logger.warning(f"Error processing page {page_num + 1}: {page_error}")
-                    continue
+                    file_mtime = os.stat(file_path).st_mtime_ns
+                    page_texts = list(get_page_pool().map(
+                        _extract_pdfplumber_page_worker,
+                        [(file_path, file_mtime, page_num) for page_num in range(num_pages)],
+                        chunksize=4
+                    ))
+                except Exception as pool_error:
+                    if isinstance(pool_error, BrokenProcessPool):
+                        discard_page_pool()
+                    logger.warning(f"Parallel page extraction failed, extracting serially: {pool_error}")
+                
+                if page_texts is not None:
+                    extracted_text = "".join(page_texts)
+                else:
+                    extracted_text = "".join(
+                        _extract_pdfplumber_page_text(page, page_num)
+                        for page_num, page in enumerate(pdf.pages)
+                    )
+            else:
+                extracted_text = "".join(
+                    _extract_pdfplumber_page_text(page, page_num)
+                    for page_num, page in enumerate(pdf.pages)
+                )
         
         if extracted_text.strip():
             logger.info(f"Successfully extracted {len(extracted_text)} characters with pdfplumber")
@@ -178,26 +446,42 @@ def advanced_pdf_extraction(file_path: str) -> str:
     except Exception as e:
         logger.warning(f"pdfplumber failed for {file_path}: {e}")
     
-    # Method 2: Fallback to PyPDF2
+    # Method 2: Fallback to pypdfium2 (PDFium C++ bindings, much faster than pure-Python parsers)
     try:
-        logger.info(f"Falling back to PyPDF2 for {file_path}")
-        with open(file_path, 'rb') as file:
-            reader = PdfReader(file)
-            for page_num, page in enumerate(reader.pages):
+        logger.info(f"Falling back to pypdfium2 for {file_path}")
+        if not is_path:
+            pdf_source.seek(0)
+        pdf = pdfium.PdfDocument(pdf_source)
+        page_parts = []
+        try:
+            for page_num in range(len(pdf)):
+                page = None
+                textpage = None
                 try:
-                    page_text = page.extract_text()
+                    page = pdf[page_num]
+                    textpage = page.get_textpage()
+                    page_text = textpage.get_text_range()
                     if page_text and page_text.strip():
-                        extracted_text += f"\n=== Page {page_num + 1} ===\n{page_text}\n"
+                        page_parts.append(f"\n=== Page {page_num + 1} ===\n{page_text}\n")
                 except Exception as page_error:
                     logger.warning(f"Error extracting page {page_num + 1}: {page_error}")
                     continue
+                finally:
+                    # Free native page resources right away to keep memory bounded on large PDFs
+                    if textpage is not None:
+                        textpage.close()
+                    if page is not None:
+                        page.close()
+        finally:
+            pdf.close()
         
+        extracted_text = "".join(page_parts)
         if extracted_text.strip():
-            logger.info(f"Extracted {len(extracted_text)} characters with PyPDF2")
+            logger.info(f"Extracted {len(extracted_text)} characters with pypdfium2")
             return preprocess_text_content(extracted_text)
             
     except Exception as e:
-        logger.error(f"PyPDF2 also failed for {file_path}: {e}")
+        logger.error(f"pypdfium2 also failed for {file_path}: {e}")
     
     raise ValueError(f"Failed to extract text from {file_path} using all available methods")
 
@@ -206,8 +490,6 @@ def preprocess_text_content(text: str) -> str:
     if not text or not text.strip():
         return ""
     
-    download_nltk_data()
-    
     # Basic cleaning
     text = re.sub(r'\n+', '\n', text)  # Multiple newlines to single
     text = re.sub(r'\s+', ' ', text)   # Multiple spaces to single
@@ -219,12 +501,16 @@ def preprocess_text_content(text: str) -> str:
     
     for line in lines:
         line = line.strip()
-        # Skip likely headers/footers and page numbers
-        if (len(line) < 5 or 
-            re.match(r'^(page|chapter|\d+|©|\s*\d+\s*)$', line.lower()) or
+        if len(line) < 5:
+            continue
+        lowered = line.lower()
+        # Skip likely headers/footers and page numbers.
+        # Whitespace is already collapsed, so a stripped line with no space has fewer than 2 words;
+        # this avoids building a word list just to count it.
+        if (re.match(r'^(page|chapter|\d+|©|\s*\d+\s*)$', lowered) or
             re.match(r'^\d+$', line) or
-            'copyright' in line.lower() or
-            len(line.split()) < 2):
+            'copyright' in lowered or
+            ' ' not in line):
             continue
         cleaned_lines.append(line)
     
@@ -270,10 +556,18 @@ def extract_concepts_with_retry(text: str, model: Any, model_info: Dict, max_ret
     {text}
     """
     
+    cache_key = ExactResponseCache.make_key(model_info['name'], 'concepts', concept_prompt)
+    cached_concepts = EXACT_CACHE.get(cache_key)
+    if cached_concepts:
+        logger.info(f"Using cached concepts ({len(cached_concepts)} characters)")
+        return cached_concepts
+    
+    rate_limiter = get_rate_limiter(model_info)
     for attempt in range(max_retries):
         try:
             logger.info(f"Extracting concepts (attempt {attempt + 1}/{max_retries})")
             
+            rate_limiter.acquire()
             response = model.generate_content(
                 concept_prompt,
                 request_options={"timeout": 60}
@@ -281,12 +575,15 @@ def extract_concepts_with_retry(text: str, model: Any, model_info: Dict, max_ret
             
             if response and response.text and len(response.text.strip()) > 50:
                 logger.info(f"Successfully extracted concepts ({len(response.text)} characters)")
+                EXACT_CACHE.set(cache_key, response.text.strip())
                 return response.text.strip()
             else:
                 logger.warning(f"Empty or short response on attempt {attempt + 1}")
                 
         except Exception as e:
             logger.warning(f"Concept extraction attempt {attempt + 1} failed: {str(e)[:100]}...")
+            if is_rate_limit_error(e):
+                rate_limiter.penalize()
             if attempt < max_retries - 1:
                 wait_time = model_info.get('rate_limit_delay', 2.0) * (attempt + 1)
                 logger.info(f"Waiting {wait_time} seconds before retry...")
@@ -306,10 +603,9 @@ def create_fallback_concepts(text: str) -> str:
         # Extract potential technical terms
         words = re.findall(r'\b[A-Za-z]{4,}\b', text.lower())
         stop_words = set(stopwords.words('english'))
-        technical_words = [word for word in words if word not in stop_words]
         
-        # Get most common terms
-        word_freq = Counter(technical_words)
+        # Get most common terms (counted straight from the filter, no intermediate list)
+        word_freq = Counter(word for word in words if word not in stop_words)
         top_terms = word_freq.most_common(10)
         
         # Extract numerical data
@@ -331,40 +627,22 @@ def create_fallback_concepts(text: str) -> str:
         logger.error(f"Fallback concept creation failed: {e}")
         return "CONCEPT 1: General Technical Content\n- Details: Content extracted from PDF document\n- Applications: Technical/Engineering domain"
 
-def generate_gate_questions_with_retry(concepts: str, text_context: str, previous_questions: List[Dict], 
-                                     model: Any, model_info: Dict, difficulty: str, 
-                                     num_questions: int = 3, max_retries: int = 3) -> str:
-    """Generate GATE level questions with comprehensive retry logic"""
-    
-    difficulty_contexts = {
-        "easy": "undergraduate level focusing on basic application of concepts from the provided text",
-        "medium": "GATE level with moderate complexity using specific concepts, formulas, and data from the text", 
-        "advanced": "advanced GATE level with complex scenarios using detailed technical content from the text"
-    }
-    
-    previous_context = ""
-    if previous_questions:
-        previous_context = f"""
-Previous questions in this set for interconnection:
-{chr(10).join([f"Q{i+1}: {q['question'][:80]}..." for i, q in enumerate(previous_questions[-2:])])}
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a Gemini API error is a quota/rate limit (HTTP 429) error"""
+    if type(error).__name__ == 'ResourceExhausted':
+        return True
+    message = str(error)
+    return '429' in message or 'quota' in message.lower()
 
-Make sure new questions build upon or relate to these concepts logically.
-"""
-    
-    gate_prompt = f"""You are an expert GATE (Graduate Aptitude Test in Engineering) question creator.
-
-{previous_context}
-
-EXTRACTED CONCEPTS FROM PDF:
-{concepts[:2000]}...
-
-CONTEXT FROM PDF:
-{text_context[:1000]}...
+# Static instructions go first so every question request shares the same prompt prefix,
+# which lets Gemini's implicit context caching reuse it instead of re-processing it
+GATE_PROMPT_INSTRUCTIONS = """You are an expert GATE (Graduate Aptitude Test in Engineering) question creator.
 
-Create {num_questions} GATE-style multiple choice questions at {difficulty_contexts[difficulty]} that:
+You will be given concepts and context extracted from a PDF, followed by a task describing
+how many questions to create and at what difficulty.
 
 STRICT REQUIREMENTS:
-1. Use ONLY concepts, formulas, values, and technical details from the PDF content above
+1. Use ONLY concepts, formulas, values, and technical details from the PDF content provided
 2. Present practical engineering scenarios requiring problem-solving
 3. Include numerical calculations using specific values from the PDF when possible
 4. Test conceptual understanding through application scenarios
@@ -372,41 +650,171 @@ STRICT REQUIREMENTS:
 6. Make questions require analysis and reasoning, not memorization
 
 QUESTION FORMAT (VERY IMPORTANT):
-Q1: [Engineering scenario using specific PDF concepts - be detailed and technical]
-A) [Technically accurate option based on PDF content]
-B) [Plausible alternative based on PDF content] 
-C) [Another technically sound option]
-D) [Common misconception or incorrect calculation]
-Correct: [A/B/C/D]
-Explanation: [Why correct based on PDF content and technical reasoning]
-PDF_Source: [Which specific concept from PDF this tests]
-
-Q2: [Build on Q1 or related concept from PDF]
-A) [Option based on PDF]
-B) [Alternative from PDF]
-C) [Another option]
-D) [Incorrect but plausible]
-Correct: [A/B/C/D]
-Explanation: [Technical justification]
-PDF_Source: [PDF concept reference]
-
-Continue this exact format for all {num_questions} questions.
+Return a JSON array with one object per question, each with:
+- "question": Engineering scenario using specific PDF concepts - be detailed and technical
+- "options": Exactly four strings, prefixed "A) ", "B) ", "C) ", "D) ":
+  a technically accurate option, a plausible alternative, another technically sound option,
+  and a common misconception or incorrect calculation, all based on PDF content
+- "correct_answer": One of "A", "B", "C", "D"
+- "explanation": Why correct based on PDF content and technical reasoning
+- "pdf_reference": Which specific concept from PDF this tests
+
+Later questions should build on earlier ones or related concepts from the PDF.
 Each question must be technically sound and based on the PDF content.
+"""
+
+# Response schema for structured (JSON) question output
+QUESTIONS_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {
+            'question': {'type': 'STRING'},
+            'options': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+            'correct_answer': {'type': 'STRING', 'enum': ['A', 'B', 'C', 'D']},
+            'explanation': {'type': 'STRING'},
+            'pdf_reference': {'type': 'STRING'}
+        },
+        'required': ['question', 'options', 'correct_answer']
+    }
+}
+
+QUESTIONS_GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': QUESTIONS_SCHEMA
+}
+
+GATE_PROMPT_TEMPLATE = GATE_PROMPT_INSTRUCTIONS + """
+EXTRACTED CONCEPTS FROM PDF:
+{concepts}...
+
+CONTEXT FROM PDF:
+{text_context}...
+{previous_context}{focus_context}
+TASK:
+Create {num_questions} GATE-style multiple choice questions at {difficulty_context}.
+Return exactly {num_questions} questions in the JSON format above.
+"""
+
+DIFFICULTY_CONTEXTS = {
+    "easy": "undergraduate level focusing on basic application of concepts from the provided text",
+    "medium": "GATE level with moderate complexity using specific concepts, formulas, and data from the text", 
+    "advanced": "advanced GATE level with complex scenarios using detailed technical content from the text"
+}
+
+# Concept headings as written by the concept extraction prompt and create_fallback_concepts
+# (tolerating Markdown bold/heading markers around them)
+CONCEPT_HEADING_PATTERN = re.compile(r'^[\s*#]*CONCEPT\s+\d+:\s*(.+?)[\s*]*$', re.MULTILINE)
+
+def build_batch_focus(concepts: str, batch_num: int, batches_needed: int) -> str:
+    """Point each concurrently generated batch at its own share of the concepts"""
+    if batches_needed <= 1:
+        return ""
+    
+    concept_names = CONCEPT_HEADING_PATTERN.findall(concepts)
+    if concept_names:
+        # Disjoint round-robin slices while there are enough concepts
+        share = concept_names[batch_num::batches_needed]
+        overlap_note = ""
+        if not share:
+            # More batches than concepts: reuse a concept, but from a different angle
+            concept_index = batch_num % len(concept_names)
+            share = [concept_names[concept_index]]
+            overlap_note = f"Part {concept_index + 1} also covers this concept; test different aspects of it.\n"
+        return f"""
+FOCUS FOR THIS PART ({batch_num + 1} of {batches_needed}):
+Base these questions on: {', '.join(share)}.
+{overlap_note}Other parts of this test are generated separately; do not ask about facts, formulas or values outside this focus.
 """
     
+    return f"""
+FOCUS FOR THIS PART ({batch_num + 1} of {batches_needed}):
+Other parts of this test are generated separately from the same content; choose part {batch_num + 1}'s
+share of the material so the parts do not repeat each other.
+"""
+
+def dedupe_questions(questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop questions whose text repeats an earlier one (ignoring case and spacing)"""
+    seen = set()
+    unique_questions = []
+    for question in questions:
+        key = ' '.join(question['question'].lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique_questions.append(question)
+    
+    if len(unique_questions) < len(questions):
+        logger.warning(f"Dropped {len(questions) - len(unique_questions)} duplicate questions")
+    return unique_questions
+
+def build_gate_prompt(concepts: str, text_context: str, previous_questions: List[Dict],
+                      difficulty: str, num_questions: int = 3, focus_context: str = "") -> str:
+    """Build the GATE question generation prompt (static prefix, then PDF content, then the task)"""
+    
+    previous_context = ""
+    if previous_questions:
+        previous_context = f"""
+Previous questions in this set for interconnection:
+{chr(10).join([f"Q{i+1}: {q['question'][:80]}..." for i, q in enumerate(previous_questions[-2:])])}
+
+Make sure new questions build upon or relate to these concepts logically.
+"""
+    
+    return GATE_PROMPT_TEMPLATE.format(
+        concepts=concepts[:2000],
+        text_context=text_context[:1000],
+        previous_context=previous_context,
+        focus_context=focus_context,
+        num_questions=num_questions,
+        difficulty_context=DIFFICULTY_CONTEXTS[difficulty]
+    )
+
+async def generate_gate_questions_with_retry(concepts: str, text_context: str, previous_questions: List[Dict], 
+                                           model: Any, model_info: Dict, difficulty: str, 
+                                           num_questions: int = 3, max_retries: int = 3,
+                                           cache_slot: int = 0, focus_context: str = "") -> str:
+    """Generate GATE level questions with comprehensive retry logic"""
+    gate_prompt = build_gate_prompt(concepts, text_context, previous_questions, difficulty, num_questions,
+                                    focus_context)
+    
+    # Only the PDF-derived part of the prompt is embedded; the instructions are identical for every call.
+    # The slot keeps concurrent batches over the same content from returning the same questions.
+    exact_key = ExactResponseCache.make_key(model_info['name'], difficulty, num_questions, cache_slot, gate_prompt)
+    cached_output = await asyncio.to_thread(EXACT_CACHE.get, exact_key)
+    if cached_output:
+        logger.info("✅ Using cached questions (exact match)")
+        return cached_output
+    
+    # Near-duplicate content from any PDF may reuse questions made with the same settings
+    cache_scope = f"{model_info['name']}|{difficulty}|{num_questions}|{cache_slot}"
+    cache_text = f"{concepts[:2000]}\n{text_context[:1000]}"
+    cached_output, similarity, cache_embedding = await asyncio.to_thread(
+        QUESTION_CACHE.get, cache_scope, cache_text
+    )
+    if cached_output:
+        logger.info(f"✅ Using cached questions (similarity {similarity:.3f})")
+        return cached_output
+    
+    rate_limiter = get_rate_limiter(model_info)
     for attempt in range(max_retries):
         try:
             logger.info(f"Generating questions (attempt {attempt + 1}/{max_retries})")
             
-            response = model.generate_content(
+            await rate_limiter.acquire_async()
+            response = await model.generate_content_async(
                 gate_prompt,
+                generation_config=QUESTIONS_GENERATION_CONFIG,
                 request_options={"timeout": 90}
             )
             
             if response and response.text and len(response.text.strip()) > 200:
                 # Quick validation - check if it contains questions
-                if 'Q1:' in response.text and 'Correct:' in response.text:
+                if parse_questions_json(response.text):
                     logger.info(f"✅ Successfully generated questions ({len(response.text)} characters)")
+                    await asyncio.to_thread(EXACT_CACHE.set, exact_key, response.text.strip())
+                    await asyncio.to_thread(
+                        QUESTION_CACHE.set, cache_scope, cache_text, response.text.strip(), cache_embedding
+                    )
                     return response.text.strip()
                 else:
                     logger.warning(f"Generated text doesn't contain proper question format on attempt {attempt + 1}")
@@ -416,10 +824,13 @@ Each question must be technically sound and based on the PDF content.
         except Exception as e:
             logger.warning(f"Question generation attempt {attempt + 1} failed: {str(e)[:100]}...")
             
-        if attempt < max_retries - 1:
-            wait_time = model_info.get('rate_limit_delay', 2.0) * (attempt + 1)
-            logger.info(f"Waiting {wait_time} seconds before retry...")
-            time.sleep(wait_time)
+            # Only back off when the API tells us we are over quota
+            if is_rate_limit_error(e):
+                rate_limiter.penalize()
+                if attempt < max_retries - 1:
+                    wait_time = model_info.get('rate_limit_delay', 2.0) * (2 ** attempt) + random.uniform(0, 1)
+                    logger.info(f"Rate limited, waiting {wait_time:.1f} seconds before retry...")
+                    await asyncio.sleep(wait_time)
     
     logger.warning("All question generation attempts failed, using fallback")
     return create_fallback_questions(concepts, difficulty, num_questions)
@@ -440,6 +851,58 @@ PDF_Source: General technical concepts from document""")
     
     return '\n\n'.join(fallback_questions)
 
+# One compiled pattern per question block: question line, options A-D, answer,
+# then optional explanation and source lines. Extra lines after the question are skipped.
+QUESTION_BLOCK_PATTERN = re.compile(
+    r'Q\d+:\s*(?P<question>[^\n]+)'
+    r'(?:\n(?![ \t]*(?:A\)|Q\d+:))[^\n]*)*?'
+    r'\n\s*(?P<option_a>A\)[^\n]*)'
+    r'\n\s*(?P<option_b>B\)[^\n]*)'
+    r'\n\s*(?P<option_c>C\)[^\n]*)'
+    r'\n\s*(?P<option_d>D\)[^\n]*)'
+    r'\n\s*Correct:[ \t]*(?P<correct>[^\n]*)'
+    r'(?:\n\s*Explanation:[ \t]*(?P<explanation>[^\n]*))?'
+    r'(?:\n\s*PDF_Source:[ \t]*(?P<pdf_reference>[^\n]*))?'
+)
+
+def parse_questions_json(output: str) -> List[Dict[str, Any]]:
+    """Parse structured (JSON) question output, returning [] if it isn't valid question JSON"""
+    try:
+        items = json.loads(output)
+    except (TypeError, ValueError):
+        return []
+    
+    if not isinstance(items, list):
+        return []
+    
+    questions = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        
+        question = str(item.get('question', '')).strip()
+        options = item.get('options')
+        correct_answer = str(item.get('correct_answer', '')).strip()
+        if not question or not correct_answer or not isinstance(options, list) or len(options) != 4:
+            continue
+        
+        # Keep the "A) ..." option shape used by the text format
+        options = [
+            option if re.match(r'^[A-D]\)', option) else f"{letter}) {option}"
+            for letter, option in zip('ABCD', (str(option).strip() for option in options))
+        ]
+        
+        questions.append({
+            'question': question,
+            'options': options,
+            'correct_answer': correct_answer,
+            'explanation': str(item.get('explanation', '')).strip(),
+            'pdf_reference': str(item.get('pdf_reference', '')).strip(),
+            'question_number': len(questions) + 1
+        })
+    
+    return questions
+
 def parse_questions_robust(output: str) -> List[Dict[str, Any]]:
     """Robust question parsing with multiple fallback methods"""
     questions = []
@@ -447,48 +910,28 @@ def parse_questions_robust(output: str) -> List[Dict[str, Any]]:
         logger.warning("Empty output for question parsing")
         return questions
     
-    # Method 1: Standard parsing
+    # Structured output needs no text parsing at all
+    questions = parse_questions_json(output)
+    if questions:
+        logger.info(f"Successfully parsed {len(questions)} questions")
+        return questions
+    
+    # Method 1: Standard parsing with the compiled block pattern
     try:
-        question_blocks = re.split(r'Q\d+:', output)[1:]
-        
-        for i, block in enumerate(question_blocks):
-            if not block.strip():
-                continue
-                
-            lines = [line.strip() for line in block.strip().split('\n') if line.strip()]
-            if len(lines) < 6:  # Need question + 4 options + answer minimum
-                continue
-                
-            try:
-                question = lines[0].strip()
-                options = []
-                correct_answer = ""
-                explanation = ""
-                pdf_reference = ""
-                
-                for line in lines[1:]:
-                    if re.match(r'^[A-D]\)', line):
-                        options.append(line)
-                    elif line.startswith('Correct:'):
-                        correct_answer = line.split(':', 1)[1].strip()
-                    elif line.startswith('Explanation:'):
-                        explanation = line.split(':', 1)[1].strip()
-                    elif line.startswith('PDF_Source:'):
-                        pdf_reference = line.split(':', 1)[1].strip()
-                
-                if len(options) == 4 and question and correct_answer:
-                    questions.append({
-                        'question': question,
-                        'options': options,
-                        'correct_answer': correct_answer,
-                        'explanation': explanation,
-                        'pdf_reference': pdf_reference,
-                        'question_number': len(questions) + 1
-                    })
-                    
-            except Exception as e:
-                logger.warning(f"Error parsing question block {i+1}: {e}")
+        for match in QUESTION_BLOCK_PATTERN.finditer(output):
+            question = match.group('question').strip()
+            correct_answer = match.group('correct').strip()
+            if not question or not correct_answer:
                 continue
+            
+            questions.append({
+                'question': question,
+                'options': [match.group(f'option_{letter}').strip() for letter in 'abcd'],
+                'correct_answer': correct_answer,
+                'explanation': (match.group('explanation') or '').strip(),
+                'pdf_reference': (match.group('pdf_reference') or '').strip(),
+                'question_number': len(questions) + 1
+            })
                 
     except Exception as e:
         logger.error(f"Standard question parsing failed: {e}")
@@ -528,67 +971,154 @@ def parse_questions_robust(output: str) -> List[Dict[str, Any]]:
     logger.info(f"Successfully parsed {len(questions)} questions")
     return questions
 
-def create_question_series_robust(concepts: str, all_text: str, model: Any, model_info: Dict, 
-                                difficulty: str, total_questions: int = 10) -> List[Dict[str, Any]]:
-    """Create question series with robust error handling"""
-    all_questions = []
+async def _generate_question_batch(concepts: str, all_text: str, model: Any, model_info: Dict,
+                                  difficulty: str, batch_num: int, batches_needed: int,
+                                  num_questions: int, semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+    """Generate a single batch of questions, bounded by the shared semaphore"""
     max_attempts_per_batch = 3
-    questions_per_batch = 3
     
-    # Calculate batches needed
-    batches_needed = (total_questions + questions_per_batch - 1) // questions_per_batch
-    
-    for batch_num in range(batches_needed):
-        remaining_questions = min(questions_per_batch, total_questions - len(all_questions))
-        if remaining_questions <= 0:
-            break
-            
-        logger.info(f"Processing batch {batch_num + 1}/{batches_needed} - {remaining_questions} questions")
+    async with semaphore:
+        logger.info(f"Processing batch {batch_num + 1}/{batches_needed} - {num_questions} questions")
         
-        batch_success = False
         for attempt in range(max_attempts_per_batch):
             try:
-                output = generate_gate_questions_with_retry(
+                output = await generate_gate_questions_with_retry(
                     concepts,
                     all_text,
-                    all_questions,  # Previous questions for context
+                    [],  # Batches run concurrently, so there is no previous batch to build on
                     model,
                     model_info,
                     difficulty,
-                    remaining_questions
+                    num_questions,
+                    cache_slot=batch_num,
+                    # ...so each batch gets its own concepts instead, or they'd all ask the same questions
+                    focus_context=build_batch_focus(concepts, batch_num, batches_needed)
                 )
                 
                 new_questions = parse_questions_robust(output)
                 
                 if new_questions:
-                    all_questions.extend(new_questions)
-                    batch_success = True
                     logger.info(f"✅ Batch {batch_num + 1} successful: {len(new_questions)} questions")
-                    break
+                    return new_questions
                 else:
                     logger.warning(f"Batch {batch_num + 1} attempt {attempt + 1} produced no valid questions")
                     
             except Exception as e:
                 logger.error(f"Batch {batch_num + 1} attempt {attempt + 1} failed: {e}")
-                
-            if attempt < max_attempts_per_batch - 1:
-                wait_time = model_info.get('rate_limit_delay', 2.0) * (attempt + 1)
-                time.sleep(wait_time)
-        
-        if not batch_success:
-            logger.warning(f"Batch {batch_num + 1} failed completely, continuing with next batch")
-        
-        # Rate limiting between batches
-        if batch_num < batches_needed - 1:
-            time.sleep(model_info.get('rate_limit_delay', 2.0))
+    
+    logger.warning(f"Batch {batch_num + 1} failed completely, continuing with next batch")
+    return []
+
+async def _create_question_series_async(concepts: str, all_text: str, model: Any, model_info: Dict,
+                                        difficulty: str, total_questions: int) -> List[Dict[str, Any]]:
+    """Run all question batches concurrently, limited to the model's concurrency budget"""
+    questions_per_batch = 3
+    
+    # Calculate batches needed
+    batches_needed = (total_questions + questions_per_batch - 1) // questions_per_batch
+    semaphore = asyncio.Semaphore(model_info.get('max_concurrency', 4))
+    
+    batch_sizes = [
+        min(questions_per_batch, total_questions - batch_num * questions_per_batch)
+        for batch_num in range(batches_needed)
+    ]
+    
+    batch_results = await asyncio.gather(*[
+        _generate_question_batch(
+            concepts, all_text, model, model_info, difficulty,
+            batch_num, batches_needed, batch_size, semaphore
+        )
+        for batch_num, batch_size in enumerate(batch_sizes)
+    ])
+    
+    all_questions = dedupe_questions([question for batch in batch_results for question in batch])
+    for number, question in enumerate(all_questions, 1):
+        question['question_number'] = number
+    
+    return all_questions
+
+def create_question_series_robust(concepts: str, all_text: str, model: Any, model_info: Dict, 
+                                difficulty: str, total_questions: int = 10) -> List[Dict[str, Any]]:
+    """Create question series with robust error handling"""
+    all_questions = run_async(
+        _create_question_series_async(concepts, all_text, model, model_info, difficulty, total_questions)
+    )
+    return all_questions[:total_questions]
+
+def create_question_series_batch(concepts: str, all_text: str, model_info: Dict, difficulty: str,
+                                 total_questions: int = 10, poll_interval: int = 30) -> List[Dict[str, Any]]:
+    """Create question series with a single Gemini Batch API job (cheaper, but not interactive)"""
+    if not BATCH_API_AVAILABLE:
+        raise RuntimeError(BATCH_API_MISSING_MESSAGE)
+    
+    load_dotenv()
+    client = genai_batch.Client(api_key=os.getenv('GEMINI_API_KEY'))
+    questions_per_batch = 3
+    
+    # One JSONL line per batch of questions
+    batches_needed = (total_questions + questions_per_batch - 1) // questions_per_batch
+    jsonl_fd, jsonl_path = tempfile.mkstemp(suffix='.jsonl')
+    try:
+        with os.fdopen(jsonl_fd, 'w', encoding='utf-8') as f:
+            for batch_num in range(batches_needed):
+                num_questions = min(questions_per_batch, total_questions - batch_num * questions_per_batch)
+                prompt = build_gate_prompt(concepts, all_text, [], difficulty, num_questions,
+                                           build_batch_focus(concepts, batch_num, batches_needed))
+                f.write(json.dumps({
+                    "key": f"batch_{batch_num}",
+                    "request": {
+                        "contents": [{"parts": [{"text": prompt}]}],
+                        "generation_config": QUESTIONS_GENERATION_CONFIG
+                    }
+                }) + "\n")
         
-        # Stop early if we have enough questions
-        if len(all_questions) >= total_questions:
-            break
+        uploaded = client.files.upload(
+            file=jsonl_path,
+            config={'display_name': os.path.basename(jsonl_path), 'mime_type': 'jsonl'}
+        )
+    finally:
+        os.remove(jsonl_path)
+    
+    batch_job = client.batches.create(
+        model=model_info['name'],
+        src=uploaded.name,
+        config={'display_name': f"neurolearn_{difficulty}_{int(time.time())}"}
+    )
+    logger.info(f"Submitted batch job {batch_job.name} with {batches_needed} requests")
+    
+    completed_states = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+    while batch_job.state.name not in completed_states:
+        logger.info(f"Batch job state: {batch_job.state.name}, checking again in {poll_interval} seconds...")
+        time.sleep(poll_interval)
+        batch_job = client.batches.get(name=batch_job.name)
+    
+    if batch_job.state.name != 'JOB_STATE_SUCCEEDED':
+        raise RuntimeError(f"Batch job {batch_job.name} finished with state {batch_job.state.name}")
+    
+    # Results come back in arbitrary order, so sort them by key
+    outputs = {}
+    result_content = client.files.download(file=batch_job.dest.file_name).decode('utf-8')
+    for line in result_content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            parts = item['response']['candidates'][0]['content']['parts']
+            outputs[item['key']] = ''.join(part.get('text', '') for part in parts)
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"Skipping malformed batch result line: {e}")
+    
+    all_questions = []
+    for batch_num in range(batches_needed):
+        all_questions.extend(parse_questions_robust(outputs.get(f"batch_{batch_num}", "")))
+    all_questions = dedupe_questions(all_questions)
+    for number, question in enumerate(all_questions, 1):
+        question['question_number'] = number
     
     return all_questions[:total_questions]
 
-def generate_questions(pdf_paths: List[str], difficulty: str, total_questions: int = 15, save_files: bool = False) -> Dict[str, Any]:
+def generate_questions(pdf_paths: List[Union[str, IO[bytes]]], difficulty: str, total_questions: int = 15, save_files: bool = False,
+                       use_batch_api: bool = False) -> Dict[str, Any]:
     """Main function with comprehensive error handling and bug fixes"""
     
     # Input validation
@@ -613,9 +1143,16 @@ def generate_questions(pdf_paths: List[str], difficulty: str, total_questions: i
             "questions": []
         }
     
+    if use_batch_api and not BATCH_API_AVAILABLE:
+        return {
+            "success": False,
+            "error": BATCH_API_MISSING_MESSAGE,
+            "questions": []
+        }
+    
     # Initialize model
     try:
-        model, model_info = configure_gemini_with_retry()
+        model, model_info = get_gemini_model()
         logger.info(f"Using model: {model_info['name']} - {model_info['description']}")
     except Exception as e:
         logger.error(f"Model initialization failed: {e}")
@@ -626,26 +1163,46 @@ def generate_questions(pdf_paths: List[str], difficulty: str, total_questions: i
         }
     
     # Process PDF files
-    all_text = ""
+    text_parts = []
     processed_files = []
     processing_errors = []
     
-    for pdf_path in pdf_paths:
+    def extract_one(pdf_source):
         try:
-            extracted_text = advanced_pdf_extraction(pdf_path)
-            if extracted_text and extracted_text.strip():
-                all_text += f"\n\n=== Content from {pdf_path} ===\n\n{extracted_text}"
-                processed_files.append(pdf_path)
-                logger.info(f"✅ Successfully processed: {pdf_path}")
-            else:
-                error_msg = f"No text extracted from {pdf_path}"
-                processing_errors.append(error_msg)
-                logger.warning(error_msg)
+            return advanced_pdf_extraction(pdf_source), None
         except Exception as e:
-            error_msg = f"Failed to process {pdf_path}: {str(e)}"
+            return None, e
+    
+    # PDFs are independent, so extract them concurrently (results keep upload order)
+    if len(pdf_paths) > 1:
+        with ThreadPoolExecutor(max_workers=min(4, len(pdf_paths))) as executor:
+            extraction_results = list(executor.map(extract_one, pdf_paths))
+    else:
+        extraction_results = [extract_one(pdf_paths[0])]
+    
+    for pdf_source, (extracted_text, extraction_error) in zip(pdf_paths, extraction_results):
+        pdf_path = get_pdf_source_name(pdf_source)
+        if extraction_error is not None:
+            error_msg = f"Failed to process {pdf_path}: {str(extraction_error)}"
             processing_errors.append(error_msg)
             logger.error(error_msg)
+            continue
+        
+        word_count = count_words_up_to(extracted_text, MIN_DOCUMENT_WORDS) if extracted_text else 0
+        if word_count >= MIN_DOCUMENT_WORDS:
+            text_parts.append(f"\n\n=== Content from {pdf_path} ===\n\n{extracted_text}")
+            processed_files.append(pdf_path)
+            logger.info(f"✅ Successfully processed: {pdf_path}")
+        elif word_count:
+            error_msg = f"Too little text in {pdf_path} ({word_count} words, need {MIN_DOCUMENT_WORDS})"
+            processing_errors.append(error_msg)
+            logger.warning(error_msg)
+        else:
+            error_msg = f"No text extracted from {pdf_path}"
+            processing_errors.append(error_msg)
+            logger.warning(error_msg)
     
+    all_text = "".join(text_parts)
     if not all_text.strip():
         return {
             "success": False,
@@ -671,9 +1228,19 @@ def generate_questions(pdf_paths: List[str], difficulty: str, total_questions: i
     # Generate questions
     try:
         logger.info("Generating questions...")
-        question_series = create_question_series_robust(
-            concepts, all_text, model, model_info, difficulty, total_questions
-        )
+        question_series = []
+        if use_batch_api:
+            try:
+                question_series = create_question_series_batch(
+                    concepts, all_text, model_info, difficulty, total_questions
+                )
+            except Exception as e:
+                logger.warning(f"Batch API generation failed, falling back to direct calls: {e}")
+        
+        if not question_series:
+            question_series = create_question_series_robust(
+                concepts, all_text, model, model_info, difficulty, total_questions
+            )
         
         if not question_series:
             logger.error("No questions were generated")
@@ -739,24 +1306,27 @@ def generate_questions(pdf_paths: List[str], difficulty: str, total_questions: i
             
             # Save text format
             output_file = f"questions_{difficulty}_{model_name}_{timestamp}.txt"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"Questions ({difficulty.upper()} difficulty)\n")
-                f.write(f"Generated using: {model_info['name']}\n")
-                f.write(f"Generation time: {result['metadata']['generation_timestamp']}\n")
-                f.write(f"Files processed: {', '.join(processed_files)}\n")
-                f.write("=" * 80 + "\n\n")
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 16) as f:
+                header = [
+                    f"Questions ({difficulty.upper()} difficulty)",
+                    f"Generated using: {model_info['name']}",
+                    f"Generation time: {result['metadata']['generation_timestamp']}",
+                    f"Files processed: {', '.join(processed_files)}",
+                    "=" * 80
+                ]
+                f.write("\n".join(header) + "\n\n")
                 
+                # One write per question instead of one per line
                 for i, q in enumerate(question_series, 1):
-                    f.write(f"Question {i}:\n")
-                    f.write(f"{q['question']}\n\n")
-                    for option in q['options']:
-                        f.write(f"{option}\n")
-                    f.write(f"\nCorrect Answer: {q['correct_answer']}\n")
+                    lines = [f"Question {i}:", f"{q['question']}\n"]
+                    lines.extend(q['options'])
+                    lines.append(f"\nCorrect Answer: {q['correct_answer']}")
                     if q.get('explanation'):
-                        f.write(f"Explanation: {q['explanation']}\n")
+                        lines.append(f"Explanation: {q['explanation']}")
                     if q.get('pdf_reference'):
-                        f.write(f"PDF Reference: {q['pdf_reference']}\n")
-                    f.write("\n" + "─" * 60 + "\n\n")
+                        lines.append(f"PDF Reference: {q['pdf_reference']}")
+                    lines.append("\n" + "─" * 60)
+                    f.write("\n".join(lines) + "\n\n")
             
             # Save JSON format
             json_file = f"questions_{difficulty}_{model_name}_{timestamp}.json"
@@ -781,6 +1351,7 @@ if __name__ == "__main__":
 Examples:
   python question_generator.py document.pdf --difficulty medium
   python question_generator.py file1.pdf file2.pdf --difficulty advanced --total-questions 20 --save-files
+  python question_generator.py document.pdf --total-questions 30 --batch-api
   
 Prerequisites:
   1. Create .env file with: GEMINI_API_KEY=your_api_key_here
@@ -810,6 +1381,11 @@ Prerequisites:
         action="store_true",
         help="Save questions to text and JSON files"
     )
+    parser.add_argument(
+        "--batch-api", 
+        action="store_true",
+        help="Submit all prompts as one Gemini Batch API job (50%% cheaper, may take minutes to hours)"
+    )
     parser.add_argument(
         "--verbose", 
         action="store_true",
@@ -828,6 +1404,10 @@ Prerequisites:
         print("Error: Total questions must be between 1 and 50")
         exit(1)
     
+    if args.batch_api and not BATCH_API_AVAILABLE:
+        print(f"Error: {BATCH_API_MISSING_MESSAGE}")
+        exit(1)
+    
     # Check if PDF files exist
     missing_files = [f for f in args.pdf_files if not os.path.exists(f)]
     if missing_files:
@@ -843,12 +1423,14 @@ Prerequisites:
         print(f"   Difficulty: {args.difficulty}")
         print(f"   Questions: {args.total_questions}")
         print(f"   Save files: {args.save_files}")
+        print(f"   Batch API: {args.batch_api}")
         
         result = generate_questions(
             args.pdf_files, 
             args.difficulty, 
             args.total_questions, 
-            args.save_files
+            args.save_files,
+            use_batch_api=args.batch_api
         )
         
         # Print summary
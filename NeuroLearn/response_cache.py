@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _SQLiteCache:
+    """Shared connection handling for the SQLite-backed caches"""
+
+    SCHEMA: Tuple[str, ...] = ()
+
+    def __init__(self, db_path: str, ttl_days: int):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        # One long-lived connection per thread, like the app database connections
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's cache connection, creating the tables on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # WAL lets lookups run while another thread writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    for statement in self.SCHEMA:
+                        conn.execute(statement)
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+class ExactResponseCache(_SQLiteCache):
+    """SQLite-backed cache of compressed LLM responses keyed by the SHA-256 of the request"""
+
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS exact_cache (
+            key TEXT PRIMARY KEY,
+            response BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''',
+    )
+
+    def __init__(self, db_path: str = 'question_cache.db', ttl_days: int = 30):
+        super().__init__(db_path, ttl_days)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Build a cache key from everything that influences the response"""
+        return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT response FROM exact_cache WHERE key = ? AND created_at > ?',
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache lookup failed: {e}")
+            return None
+
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def set(self, key: str, response: str):
+        """Store a response under key"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO exact_cache (key, response, created_at) VALUES (?, ?, ?)',
+                        (key, zlib.compress(response.encode('utf-8')), time.time())
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache store failed: {e}")
+
+class SemanticResponseCache(_SQLiteCache):
+    """SQLite-backed cache that reuses LLM responses for semantically similar inputs"""
+
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS semantic_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope TEXT NOT NULL,
+            embedding TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''',
+        # Lookups read the newest entries of one scope; (scope, created_at) serves that directly
+        'DROP INDEX IF EXISTS idx_semantic_cache_scope',
+        'CREATE INDEX IF NOT EXISTS idx_semantic_cache_scope_created ON semantic_cache(scope, created_at)',
+    )
+
+    def __init__(self, db_path: str = 'question_cache.db', threshold: float = 0.9,
+                 ttl_days: int = 90, embed_fn: Optional[Callable[[str], List[float]]] = None,
+                 max_candidates: int = 200):
+        super().__init__(db_path, ttl_days)
+        self.threshold = threshold
+        self.embed_fn = embed_fn
+        # Similarity is computed in Python, so bound each lookup to the most recent entries
+        self.max_candidates = max_candidates
+
+    @staticmethod
+    def _cosine_similarity(a: List[float], b: List[float]) -> float:
+        """Cosine similarity between two embedding vectors"""
+        dot = sum(x * y for x, y in zip(a, b))
+        norm_a = math.sqrt(sum(x * x for x in a))
+        norm_b = math.sqrt(sum(y * y for y in b))
+        if norm_a == 0 or norm_b == 0:
+            return 0.0
+        return dot / (norm_a * norm_b)
+
+    def get(self, scope: str, text: str) -> Tuple[Optional[str], float, Optional[List[float]]]:
+        """Return (response, similarity, embedding) for the closest cached entry in scope.
+
+        The embedding is returned so a following set() does not need to embed the text again.
+        """
+        if not self.embed_fn:
+            return None, 0.0, None
+
+        try:
+            embedding = self.embed_fn(text)
+        except Exception as e:
+            logger.warning(f"Cache embedding failed: {str(e)[:100]}")
+            return None, 0.0, None
+
+        try:
+            conn = self._connect()
+            rows = conn.execute(
+                'SELECT embedding, response FROM semantic_cache WHERE scope = ? AND created_at > ? '
+                'ORDER BY created_at DESC LIMIT ?',
+                (scope, time.time() - self.ttl_seconds, self.max_candidates)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache lookup failed: {e}")
+            return None, 0.0, embedding
+
+        best_response, best_similarity = None, 0.0
+        for stored_embedding, response in rows:
+            similarity = self._cosine_similarity(embedding, json.loads(stored_embedding))
+            if similarity > best_similarity:
+                best_response, best_similarity = response, similarity
+
+        if best_similarity >= self.threshold:
+            return best_response, best_similarity, embedding
+        return None, best_similarity, embedding
+
+    def set(self, scope: str, text: str, response: str, embedding: Optional[List[float]] = None):
+        """Store a response for the given input text"""
+        if embedding is None:
+            if not self.embed_fn:
+                return
+            try:
+                embedding = self.embed_fn(text)
+            except Exception as e:
+                logger.warning(f"Cache embedding failed: {str(e)[:100]}")
+                return
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        'INSERT INTO semantic_cache (scope, embedding, response, created_at) VALUES (?, ?, ?, ?)',
+                        (scope, json.dumps(embedding), response, time.time())
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache store failed: {e}")
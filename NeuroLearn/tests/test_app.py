@@ -0,0 +1,278 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# The schema is created per test in a temporary database, not in gate_app.db on import
+os.environ.setdefault('NEUROLEARN_SKIP_INIT', '1')
+
+import pytest
+
+import app as app_module
+import db_schema
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'gate_app.db')
+    monkeypatch.setattr(db_schema, 'DB_PATH', path)
+    monkeypatch.setattr(app_module, 'DB_PATH', path)
+    db_schema.init_db()
+    
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "INSERT INTO users (id, full_name, username, email, password_hash) "
+            "VALUES (1, 'Test User', 'tester', 'tester@example.com', 'x')"
+        )
+    conn.close()
+    
+    # Start from a fresh connection for this thread and close it afterwards
+    monkeypatch.setattr(app_module._db_local, 'conn', None, raising=False)
+    yield path
+    conn = getattr(app_module._db_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+
+
+@pytest.fixture
+def client(db_path):
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+            session['username'] = 'tester'
+            session['full_name'] = 'Test User'
+        yield client
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Capture the context passed to render_template instead of rendering the page"""
+    contexts = []
+    
+    def fake_render_template(template_name, **context):
+        contexts.append(context)
+        return template_name
+    monkeypatch.setattr(app_module, 'render_template', fake_render_template)
+    return contexts
+
+
+def insert_test(db_path, score):
+    # A separate connection, as another worker process saving a test would use
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO test_history (user_id, test_name, total_questions, correct_answers, "
+            "score_percentage, time_taken, difficulty) VALUES (1, 'Test', 10, 5, ?, 100, 'medium')",
+            (score,)
+        )
+    conn.close()
+
+
+def test_dashboard_sees_tests_saved_by_other_workers(client, db_path, rendered):
+    insert_test(db_path, 50.0)
+    assert client.get('/dashboard').status_code == 200
+    assert rendered[-1]['stats']['total_tests'] == 1
+    
+    insert_test(db_path, 90.0)
+    assert client.get('/dashboard').status_code == 200
+    stats = rendered[-1]['stats']
+    assert stats['total_tests'] == 2
+    assert stats['best_score'] == 90.0
+    assert len(rendered[-1]['test_history']) == 2
+
+
+def test_dashboard_reuses_cached_data_while_unchanged(client, db_path, rendered, monkeypatch):
+    insert_test(db_path, 50.0)
+    client.get('/dashboard')
+    
+    queries = []
+    real_query_all = app_module.query_all
+    
+    def recording_query_all(conn, sql, params=()):
+        queries.append(sql)
+        return real_query_all(conn, sql, params)
+    monkeypatch.setattr(app_module, 'query_all', recording_query_all)
+    client.get('/dashboard')
+    # Only the latest-test check ran; the history and stats came from the cache
+    assert queries == []
+    assert rendered[-1]['stats']['total_tests'] == 1
+
+
+def test_login_attempts_are_rate_limited(db_path):
+    if app_module.limiter is None:
+        pytest.skip("Flask-Limiter is not installed")
+    app_module.limiter.reset()
+    with app_module.app.test_client() as client:
+        statuses = [
+            client.post('/login', data={'username': 'tester', 'password': 'wrong'}).status_code
+            for _ in range(6)
+        ]
+    assert statuses == [200] * 5 + [429]
+
+
+PDF_BYTES = b'%PDF-1.4 uploaded test document'
+GENERATED = {
+    'questions': [
+        {'question': 'What is V = IR?', 'options': ['A) a', 'B) b', 'C) c', 'D) d'], 'correct_answer': 'A'}
+    ]
+}
+
+
+@pytest.fixture
+def job_executor(monkeypatch):
+    # A fresh executor per test, so job threads open connections to this test's database
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(app_module, '_job_executor', executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def upload(client, async_job=False):
+    data = {'pdf_files': (io.BytesIO(PDF_BYTES), 'notes.pdf'), 'difficulty': 'easy', 'questions': '1'}
+    if async_job:
+        data['async'] = '1'
+    return client.post('/api/generate_questions', data=data, content_type='multipart/form-data')
+
+
+def test_upload_reaches_generator_as_spooled_file(client, monkeypatch):
+    received = []
+    
+    def fake_generate_questions(pdf_sources, difficulty, total_questions, save_files=False):
+        received.extend((type(source), source.name, source.read()) for source in pdf_sources)
+        return GENERATED
+    monkeypatch.setattr(app_module, 'generate_questions', fake_generate_questions)
+    
+    response = upload(client)
+    assert response.status_code == 200
+    assert response.get_json()['questions'][0]['question'] == 'What is V = IR?'
+    assert received == [(app_module.UploadSpool, 'notes.pdf', PDF_BYTES)]
+
+
+def test_background_job_reads_upload_after_request_ends(client, monkeypatch, job_executor):
+    release = threading.Event()
+    received = []
+    
+    def fake_generate_questions(pdf_sources, difficulty, total_questions, save_files=False):
+        release.wait(5)
+        received.extend(source.read() for source in pdf_sources)
+        return GENERATED
+    monkeypatch.setattr(app_module, 'generate_questions', fake_generate_questions)
+    
+    response = upload(client, async_job=True)
+    assert response.status_code == 202
+    release.set()
+    job_executor.shutdown(wait=True)
+    assert received == [PDF_BYTES]
+    
+    status = client.get(response.get_json()['status_url']).get_json()
+    assert status['status'] == 'done'
+    assert status['result']['questions'][0]['question'] == 'What is V = IR?'
+
+
+def test_job_queue_rejects_uploads_when_full(client, monkeypatch, job_executor):
+    monkeypatch.setattr(app_module, '_job_slots', threading.BoundedSemaphore(1))
+    release = threading.Event()
+    
+    def fake_generate_questions(pdf_sources, difficulty, total_questions, save_files=False):
+        release.wait(5)
+        return GENERATED
+    monkeypatch.setattr(app_module, 'generate_questions', fake_generate_questions)
+    
+    assert upload(client, async_job=True).status_code == 202
+    rejected = upload(client, async_job=True)
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After'] == '30'
+    
+    # The finished job gives its slot back (the single job thread runs this only after the job)
+    release.set()
+    job_executor.submit(lambda: None).result()
+    assert upload(client, async_job=True).status_code == 202
+
+
+def insert_job(db_path, job_id, status, age_seconds):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO generation_jobs (id, user_id, status, updated_at) "
+            "VALUES (?, 1, ?, datetime('now', ?))",
+            (job_id, status, f'-{age_seconds} seconds')
+        )
+    conn.close()
+
+
+def test_job_status_expires_stale_jobs(client, db_path):
+    stale_age = app_module.JOB_STALE_SECONDS + 60
+    insert_job(db_path, 'stale', 'running', stale_age)
+    insert_job(db_path, 'fresh', 'running', 10)
+    
+    stale = client.get('/api/job/stale').get_json()
+    assert stale['status'] == 'failed'
+    assert stale['result'] == json.loads(db_schema.INTERRUPTED_JOB_RESULT)
+    assert client.get('/api/job/fresh').get_json() == {'success': True, 'job_id': 'fresh', 'status': 'running'}
+
+
+def test_job_status_is_private_to_its_user(client, db_path):
+    insert_job(db_path, 'job', 'queued', 10)
+    with client.session_transaction() as session:
+        session['user_id'] = 2
+    assert client.get('/api/job/job').status_code == 404
+
+
+def test_fail_interrupted_jobs_marks_unfinished_jobs_failed(db_path):
+    insert_job(db_path, 'queued', 'queued', 10)
+    insert_job(db_path, 'done', 'done', 10)
+    db_schema.fail_interrupted_jobs()
+    
+    conn = sqlite3.connect(db_path)
+    statuses = dict(conn.execute('SELECT id, status FROM generation_jobs'))
+    conn.close()
+    assert statuses == {'queued': 'failed', 'done': 'done'}
+
+
+SUBMITTED_RESULTS = [
+    {'question_number': 1, 'question': 'Apply KVL', 'user_answer': 'A', 'correct_answer': 'A',
+     'is_correct': True, 'time_taken': 20, 'difficulty': 'easy'},
+    {'question_number': 2, 'question': 'Sketch the root locus', 'user_answer': 'B', 'correct_answer': 'C',
+     'is_correct': False, 'time_taken': 40, 'difficulty': 'easy'},
+]
+
+
+def saved_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    tests = conn.execute(
+        'SELECT id, total_questions, correct_answers, time_taken, difficulty FROM test_history'
+    ).fetchall()
+    questions = conn.execute(
+        'SELECT test_id, question_number, user_answer, correct_answer, is_correct, time_taken '
+        'FROM test_question_history ORDER BY question_number'
+    ).fetchall()
+    conn.close()
+    return tests, questions
+
+
+def test_submit_results_saves_test_and_questions(client, db_path):
+    response = client.post('/api/submit_results', json={'results': SUBMITTED_RESULTS})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is True
+    assert data['correct_answers'] == 1
+    assert data['score'] == 50.0
+    
+    tests, questions = saved_rows(db_path)
+    assert tests == [(1, 2, 1, 60, 'easy')]
+    assert questions == [(1, 1, 'A', 'A', 1, 20.0), (1, 2, 'B', 'C', 0, 40.0)]
+
+
+def test_submit_results_saves_nothing_when_a_question_row_fails(client, db_path, monkeypatch):
+    # The test row and its question rows commit together or not at all
+    monkeypatch.setattr(
+        app_module, '_Q_INSERT_QUESTION_HISTORY', 'INSERT INTO missing_table VALUES (?, ?, ?, ?, ?, ?, ?)'
+    )
+    response = client.post('/api/submit_results', json={'results': SUBMITTED_RESULTS})
+    # Saving is best effort; the analysis is still returned
+    assert response.status_code == 200
+    assert saved_rows(db_path) == ([], [])
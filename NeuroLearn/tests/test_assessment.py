@@ -0,0 +1,187 @@
+import json
+import statistics
+
+import pytest
+
+import assessment
+from assessment import PerformanceAnalyzer
+
+
+def make_result(question_number, question, is_correct=False, is_skipped=False, time_taken=30.0):
+    return {
+        'question_number': question_number,
+        'question': question,
+        'pdf_reference': '',
+        'is_correct': is_correct,
+        'is_skipped': is_skipped,
+        'time_taken': time_taken,
+    }
+
+
+FIXED_RESULTS = [
+    make_result(1, "Find the voltage across a 10 ohm resistor", is_correct=True, time_taken=20.0),
+    make_result(2, "Sketch the root locus of the open-loop system", time_taken=40.0),
+    make_result(3, "A JK flip-flop toggles when", is_skipped=True, time_taken=5.0),
+    make_result(4, "Apply KVL around the outer loop", is_correct=True, time_taken="n/a"),
+]
+
+
+@pytest.fixture
+def analyzer():
+    return PerformanceAnalyzer()
+
+
+@pytest.mark.parametrize('question, topic', [
+    ("Sketch the root locus of the system", 'control'),
+    ("Find the transfer function of the plant", 'control'),
+    ("A JK flip-flop is clocked", 'digital'),
+    ("Apply KVL to find the current through the resistor", 'circuits'),
+    ("Who wrote this chapter?", 'general'),
+    # Keywords match whole words only, so "gate" inside "navigate" and "ip" inside "tip" don't count
+    ("Navigate to the tip of the page", 'general'),
+])
+def test_categorize_question_topic(analyzer, question, topic):
+    assert analyzer.categorize_question_topic(question) == topic
+
+
+def test_categorize_question_topic_uses_pdf_reference(analyzer):
+    assert analyzer.categorize_question_topic("Which option is right?", "Bode plot section") == 'control'
+
+
+def test_categorize_question_topic_ties_go_to_first_listed_topic(analyzer):
+    # One keyword each for circuits and signals; circuits is listed first
+    assert analyzer.categorize_question_topic("voltage and frequency") == 'circuits'
+
+
+@pytest.mark.parametrize('score, grade', [
+    (0, 'D'), (34.99, 'D'), (35, 'C'), (50, 'B'), (64.99, 'B'), (65, 'B+'), (75, 'A'), (85, 'A+'), (100, 'A+'),
+])
+def test_grade_bands(analyzer, score, grade):
+    # Neutral efficiency metrics and time so the grade comes from the score alone
+    marking_analysis = {'efficiency_metrics': {'negative_impact': 0, 'attempt_rate': 70}}
+    result = analyzer._calculate_comprehensive_grade(score, 45, 0, 10, marking_analysis)
+    assert result['overall_score'] == score
+    assert result['letter_grade'] == grade
+
+
+def test_calculate_marks_with_negative_grading(analyzer):
+    marking = analyzer.calculate_marks_with_negative_grading(FIXED_RESULTS[:3])
+    assert marking['answer_distribution'] == {
+        'correct_answers': 1,
+        'incorrect_answers': 1,
+        'skipped_answers': 1,
+        'total_questions': 3,
+    }
+    # 1 + 0.1 time bonus, -1/3 for the wrong answer, 0 for the skip
+    assert marking['marking_summary']['total_marks_earned'] == pytest.approx(0.767)
+    assert marking['marking_summary']['negative_marks'] == pytest.approx(0.333)
+    assert marking['question_wise_marks'] == [
+        {'question_number': 1, 'marks_earned': 1.1, 'marking_type': 'correct', 'time_taken': 20.0},
+        {'question_number': 2, 'marks_earned': -0.333, 'marking_type': 'incorrect', 'time_taken': 40.0},
+        {'question_number': 3, 'marks_earned': 0.0, 'marking_type': 'skipped', 'time_taken': 5.0},
+    ]
+
+
+def test_analyze_performance_fixed_results(analyzer):
+    analysis = analyzer.analyze_performance(FIXED_RESULTS)
+    assert 'error' not in analysis
+    
+    overall = analysis['overall_performance']
+    assert overall['total_questions'] == 4
+    assert overall['questions_attempted'] == 3
+    assert overall['questions_skipped'] == 1
+    assert overall['correct_answers'] == 2
+    assert overall['incorrect_answers'] == 1
+    assert overall['marks_earned'] == pytest.approx(1.767)
+    assert overall['score_percentage'] == pytest.approx(44.17)
+    
+    topics = analysis['topic_wise_analysis']
+    assert set(topics) == {'circuits', 'control', 'digital'}
+    assert topics['circuits']['correct_answers'] == 2
+    assert topics['control']['marks_earned'] == pytest.approx(-0.333)
+    assert topics['digital']['questions_skipped'] == 1
+    
+    assert analysis['grade_assessment']['letter_grade'] == 'C'
+
+
+def test_analyze_performance_malformed_time_taken(analyzer):
+    analysis = analyzer.analyze_performance(FIXED_RESULTS)
+    
+    # The answer with an unusable time is still marked, but earns no time bonus
+    marks = analysis['negative_marking_analysis']['question_wise_marks']
+    assert marks[3] == {'question_number': 4, 'marks_earned': 1.0, 'marking_type': 'correct', 'time_taken': None}
+    
+    # Every view of the test counts the same answers
+    distribution = analysis['negative_marking_analysis']['answer_distribution']
+    overall = analysis['overall_performance']
+    assert distribution['correct_answers'] == overall['correct_answers']
+    assert distribution['incorrect_answers'] == overall['incorrect_answers']
+    assert distribution['skipped_answers'] == overall['questions_skipped']
+    assert sum(t['questions_total'] for t in analysis['topic_wise_analysis'].values()) == 4
+    assert sum(t['correct_answers'] for t in analysis['topic_wise_analysis'].values()) == 2
+    
+    # Only the known times feed the time statistics
+    assert overall['total_time_spent_seconds'] == 60.0
+    assert overall['average_time_per_question_seconds'] == 30.0
+    assert analysis['topic_wise_analysis']['circuits']['average_time_seconds'] == 20.0
+
+
+def test_trend_stats_match_statistics_module(analyzer):
+    times = [12.5, 48.0, 33.0, 71.25, 20.0, 305.0, 27.5]
+    results = [make_result(i + 1, "q", is_correct=i % 2 == 0, time_taken=t) for i, t in enumerate(times)]
+    stats = analyzer._compute_trend_stats(analyzer._to_columns(results))
+    
+    # Times outside 0-300 s are dropped from the response times but still count as answered
+    in_bounds = [t for t in times if t <= 300]
+    assert stats.response_times == in_bounds
+    assert stats.answered == len(times)
+    assert stats.mean_time == pytest.approx(statistics.mean(in_bounds))
+    assert stats.stdev_time == pytest.approx(statistics.stdev(in_bounds))
+    assert stats.first_third_time == pytest.approx((12.5 + 48.0) / 2)
+    assert stats.last_third_accuracy == pytest.approx(50.0)
+
+
+def test_analyze_performance_empty(analyzer):
+    assert analyzer.analyze_performance([]) == {"error": "No test results to analyze"}
+
+
+@pytest.fixture
+def test_interface(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interface = assessment.TestInterface()
+    interface.display_question = lambda question, number, total: None
+    return interface
+
+
+def test_conduct_test_logs_public_results(test_interface):
+    test_interface.get_user_answer = lambda timer: ('A', 12.0)
+    questions = [{'question': "State Ohm's law", 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'A'}] * 2
+    
+    results = test_interface.conduct_test(questions, interactive=False)
+    assert [r['is_correct'] for r in results] == [True, True]
+    
+    log_path = f"test_results/{test_interface.session_id}.jsonl"
+    with open(log_path, encoding='utf-8') as f:
+        logged = [json.loads(line) for line in f]
+    assert [entry['question_number'] for entry in logged] == [1, 2]
+    # Internal fields stay out of the returned results and the progress log
+    assert not any(key.startswith('_') for entry in results + logged for key in entry)
+
+
+def test_conduct_test_closes_progress_log_on_interrupt(test_interface, monkeypatch):
+    opened = []
+    real_open_progress_log = test_interface._open_progress_log
+    
+    def recording_open_progress_log():
+        log = real_open_progress_log()
+        opened.append(log)
+        return log
+    monkeypatch.setattr(test_interface, '_open_progress_log', recording_open_progress_log)
+    
+    def interrupt(timer):
+        raise KeyboardInterrupt
+    test_interface.get_user_answer = interrupt
+    
+    with pytest.raises(KeyboardInterrupt):
+        test_interface.conduct_test([{'question': 'q', 'correct_answer': 'A'}], interactive=False)
+    assert opened[0].closed
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from question_generator import (
+    MIN_DOCUMENT_WORDS,
+    build_batch_focus,
+    count_words_up_to,
+    dedupe_questions,
+    parse_questions_json,
+    parse_questions_robust,
+)
+
+TEXT_OUTPUT = """Here are the questions:
+
+Q1: A 10 ohm resistor carries 2 A. What is the voltage across it?
+(Use Ohm's law)
+A) 5 V
+B) 20 V
+C) 12 V
+D) 0.2 V
+Correct: B
+Explanation: V = IR = 2 * 10 = 20 V
+PDF_Source: Ohm's law section
+
+Q2: Which law states that currents into a node sum to zero?
+A) KVL
+B) KCL
+C) Faraday's law
+D) Lenz's law
+Correct: B
+"""
+
+
+def test_parse_questions_json_normalizes_options():
+    output = json.dumps([
+        {
+            'question': ' What is 2 + 2? ',
+            'options': ['3', 'B) 4', '5', '6'],
+            'correct_answer': 'B',
+            'explanation': 'Arithmetic',
+        }
+    ])
+    questions = parse_questions_json(output)
+    assert questions == [{
+        'question': 'What is 2 + 2?',
+        'options': ['A) 3', 'B) 4', 'C) 5', 'D) 6'],
+        'correct_answer': 'B',
+        'explanation': 'Arithmetic',
+        'pdf_reference': '',
+        'question_number': 1,
+    }]
+
+
+def test_parse_questions_json_skips_invalid_items():
+    output = json.dumps([
+        {'question': 'Three options only', 'options': ['a', 'b', 'c'], 'correct_answer': 'A'},
+        {'question': '', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'A'},
+        'not an object',
+        {'question': 'Valid', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'D'},
+    ])
+    questions = parse_questions_json(output)
+    assert [q['question'] for q in questions] == ['Valid']
+    assert questions[0]['question_number'] == 1
+
+
+def test_parse_questions_json_rejects_non_json():
+    assert parse_questions_json('Q1: not json') == []
+    assert parse_questions_json('{"question": "not a list"}') == []
+
+
+def test_parse_questions_robust_text_blocks():
+    questions = parse_questions_robust(TEXT_OUTPUT)
+    assert len(questions) == 2
+    
+    first, second = questions
+    assert first['question'] == 'A 10 ohm resistor carries 2 A. What is the voltage across it?'
+    assert first['options'] == ['A) 5 V', 'B) 20 V', 'C) 12 V', 'D) 0.2 V']
+    assert first['correct_answer'] == 'B'
+    assert first['explanation'] == 'V = IR = 2 * 10 = 20 V'
+    assert first['pdf_reference'] == "Ohm's law section"
+    
+    # Explanation and source lines are optional
+    assert second['explanation'] == ''
+    assert second['pdf_reference'] == ''
+    assert [q['question_number'] for q in questions] == [1, 2]
+
+
+def test_parse_questions_robust_falls_back_to_partial_blocks():
+    output = "Q1: Which device stores charge?\nA) Capacitor\nB) Resistor\nsome notes\nmore notes\n"
+    questions = parse_questions_robust(output)
+    assert len(questions) == 1
+    assert questions[0]['options'] == ['A) Capacitor', 'B) Resistor', 'C) Additional option', 'D) Additional option']
+    assert questions[0]['correct_answer'] == 'A'
+
+
+def test_parse_questions_robust_empty_output():
+    assert parse_questions_robust('') == []
+    assert parse_questions_robust('   ') == []
+
+
+def test_dedupe_questions_ignores_case_and_spacing():
+    questions = [{'question': 'What is  Ohm law?'}, {'question': 'what is ohm law?'}, {'question': 'What is KVL?'}]
+    assert dedupe_questions(questions) == [{'question': 'What is  Ohm law?'}, {'question': 'What is KVL?'}]
+
+
+def test_build_batch_focus_splits_concepts_between_batches():
+    concepts = "CONCEPT 1: Ohm's Law\n- Details: ...\n\n**CONCEPT 2: KVL**\n\nCONCEPT 3: Thevenin\n"
+    assert build_batch_focus(concepts, 0, 1) == ""
+    assert "Base these questions on: Ohm's Law, Thevenin." in build_batch_focus(concepts, 0, 2)
+    assert "Base these questions on: KVL." in build_batch_focus(concepts, 1, 2)
+    
+    # More batches than concepts: the concept is reused from a different angle
+    focus = build_batch_focus(concepts, 3, 4)
+    assert "Base these questions on: Ohm's Law." in focus
+    assert "Part 1 also covers this concept" in focus
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    'one',
+    '  Ohm law\tand\nKVL  ',
+    'V=IR\r\n\r\nP = VI \u00b7 t',
+    'word ' * 49,
+])
+def test_count_words_up_to_matches_split_below_limit(text):
+    assert count_words_up_to(text, MIN_DOCUMENT_WORDS) == len(text.split())
+
+
+def test_count_words_up_to_stops_at_limit():
+    assert count_words_up_to('word ' * 10_000, MIN_DOCUMENT_WORDS) == MIN_DOCUMENT_WORDS
+    assert count_words_up_to('a b c', 0) == 0
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import question_generator
+from question_generator import TokenBucket, get_rate_limiter
+
+
+class FakeTime:
+    """Stands in for the time module: a manual clock, and sleeps that are recorded instead of taken"""
+    
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(question_generator, 'time', fake)
+    return fake
+
+
+def test_full_bucket_allows_a_minutes_quota_without_waiting(fake_time):
+    bucket = TokenBucket(requests_per_minute=15)
+    for _ in range(15):
+        bucket.acquire()
+    assert fake_time.sleeps == []
+    
+    # 15 per minute refills one token every 4 seconds
+    bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(4.0)]
+
+
+def test_waiters_queue_behind_each_other(fake_time):
+    bucket = TokenBucket(requests_per_minute=60)
+    for _ in range(60):
+        bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(1.0), pytest.approx(2.0)]
+
+
+def test_bucket_refills_over_time_up_to_capacity(fake_time):
+    bucket = TokenBucket(requests_per_minute=15)
+    for _ in range(15):
+        bucket.acquire()
+    fake_time.now += 8
+    bucket.acquire()
+    bucket.acquire()
+    assert fake_time.sleeps == []
+    
+    fake_time.now += 3600
+    for _ in range(15):
+        bucket.acquire()
+    assert fake_time.sleeps == []
+    bucket.acquire()
+    assert len(fake_time.sleeps) == 1
+
+
+def test_penalize_halves_rate_until_cool_down_ends(fake_time):
+    bucket = TokenBucket(requests_per_minute=60, penalty_seconds=30)
+    for _ in range(60):
+        bucket.acquire()
+    bucket.penalize()
+    bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(2.0)]
+    
+    # Repeated 429s keep halving, down to an eighth of the base rate
+    for _ in range(5):
+        bucket.penalize()
+    assert bucket.rate == pytest.approx(bucket.base_rate / 8)
+    
+    fake_time.now += 31
+    bucket.acquire()
+    assert bucket.rate == bucket.base_rate
+
+
+def test_acquire_async_waits_without_blocking(fake_time, monkeypatch):
+    async_sleeps = []
+    
+    async def fake_sleep(seconds):
+        async_sleeps.append(seconds)
+    monkeypatch.setattr(question_generator.asyncio, 'sleep', fake_sleep)
+    
+    bucket = TokenBucket(requests_per_minute=60)
+    
+    async def take(count):
+        for _ in range(count):
+            await bucket.acquire_async()
+    asyncio.run(take(61))
+    assert async_sleeps == [pytest.approx(1.0)]
+    assert fake_time.sleeps == []
+
+
+def test_get_rate_limiter_shares_one_bucket_per_model():
+    model_info = {'name': 'test-model-shared', 'requests_per_minute': 30}
+    limiter = get_rate_limiter(model_info)
+    assert get_rate_limiter(dict(model_info)) is limiter
+    assert limiter.capacity == 30
+    assert get_rate_limiter({'name': 'test-model-other'}) is not limiter
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import response_cache
+from response_cache import ExactResponseCache, SemanticResponseCache
+
+DAY = 24 * 60 * 60
+
+# Fixed embeddings: "ohm" and "ohm reworded" are near-duplicates, "kvl" is a different passage
+EMBEDDINGS = {
+    'ohm': [1.0, 0.0, 0.0],
+    'ohm reworded': [0.99, 0.05, 0.0],
+    'kvl': [0.6, 0.8, 0.0],
+}
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+    
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, 'time', clock.time)
+    return clock
+
+
+@pytest.fixture
+def embed_calls():
+    return []
+
+
+@pytest.fixture
+def semantic_cache(tmp_path, embed_calls):
+    def embed(text):
+        embed_calls.append(text)
+        return EMBEDDINGS[text]
+    return SemanticResponseCache(db_path=str(tmp_path / 'cache.db'), threshold=0.97, ttl_days=90, embed_fn=embed)
+
+
+def test_semantic_cache_hits_near_duplicate(semantic_cache):
+    semantic_cache.set('scope', 'ohm', 'questions about ohm')
+    response, similarity, embedding = semantic_cache.get('scope', 'ohm reworded')
+    assert response == 'questions about ohm'
+    assert similarity >= 0.97
+    assert embedding == EMBEDDINGS['ohm reworded']
+
+
+def test_semantic_cache_misses_below_threshold(semantic_cache):
+    semantic_cache.set('scope', 'ohm', 'questions about ohm')
+    response, similarity, embedding = semantic_cache.get('scope', 'kvl')
+    assert response is None
+    assert similarity == pytest.approx(0.6)
+    # The embedding comes back so the caller can store its own response without embedding again
+    assert embedding == EMBEDDINGS['kvl']
+
+
+def test_semantic_cache_set_reuses_lookup_embedding(semantic_cache, embed_calls):
+    _, _, embedding = semantic_cache.get('scope', 'kvl')
+    semantic_cache.set('scope', 'kvl', 'questions about kvl', embedding)
+    assert embed_calls == ['kvl']
+    assert semantic_cache.get('scope', 'kvl')[0] == 'questions about kvl'
+
+
+def test_semantic_cache_scopes_are_isolated(semantic_cache):
+    semantic_cache.set('model|easy|5|0', 'ohm', 'easy questions')
+    assert semantic_cache.get('model|hard|5|0', 'ohm')[0] is None
+    assert semantic_cache.get('model|easy|5|1', 'ohm')[0] is None
+    assert semantic_cache.get('model|easy|5|0', 'ohm')[0] == 'easy questions'
+
+
+def test_semantic_cache_expires_after_ttl(semantic_cache, clock):
+    semantic_cache.set('scope', 'ohm', 'questions about ohm')
+    clock.now += 89 * DAY
+    assert semantic_cache.get('scope', 'ohm')[0] == 'questions about ohm'
+    clock.now += 2 * DAY
+    assert semantic_cache.get('scope', 'ohm')[0] is None
+
+
+def test_semantic_cache_prefers_closest_entry(semantic_cache):
+    semantic_cache.set('scope', 'ohm reworded', 'reworded questions')
+    semantic_cache.set('scope', 'ohm', 'original questions')
+    assert semantic_cache.get('scope', 'ohm')[0] == 'original questions'
+
+
+def test_semantic_cache_without_embedder_is_disabled(tmp_path):
+    cache = SemanticResponseCache(db_path=str(tmp_path / 'cache.db'))
+    cache.set('scope', 'ohm', 'questions')
+    assert cache.get('scope', 'ohm') == (None, 0.0, None)
+
+
+def test_semantic_cache_survives_embedding_errors(tmp_path):
+    def failing_embed(text):
+        raise RuntimeError("quota exceeded")
+    cache = SemanticResponseCache(db_path=str(tmp_path / 'cache.db'), embed_fn=failing_embed)
+    assert cache.get('scope', 'ohm') == (None, 0.0, None)
+    cache.set('scope', 'ohm', 'questions')
+
+
+@pytest.fixture
+def exact_cache(tmp_path):
+    return ExactResponseCache(db_path=str(tmp_path / 'cache.db'), ttl_days=30)
+
+
+def test_make_key_depends_on_every_part():
+    key = ExactResponseCache.make_key('model', 'easy', 5, 'prompt')
+    assert key == ExactResponseCache.make_key('model', 'easy', 5, 'prompt')
+    assert key != ExactResponseCache.make_key('model', 'hard', 5, 'prompt')
+    assert key != ExactResponseCache.make_key('model', 'easy', 5, 'other prompt')
+    assert len(key) == 64
+
+
+def test_exact_cache_round_trip(exact_cache):
+    assert exact_cache.get('key') is None
+    exact_cache.set('key', 'Q1: what is a node? \u2713')
+    assert exact_cache.get('key') == 'Q1: what is a node? \u2713'
+    exact_cache.set('key', 'replaced')
+    assert exact_cache.get('key') == 'replaced'
+
+
+def test_exact_cache_expires_after_ttl(exact_cache, clock):
+    exact_cache.set('key', 'response')
+    clock.now += 29 * DAY
+    assert exact_cache.get('key') == 'response'
+    clock.now += 2 * DAY
+    assert exact_cache.get('key') is None
+
+
+def test_exact_cache_shared_between_threads(exact_cache):
+    # Each thread gets its own connection to the same database file
+    exact_cache.set('key', 'response')
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: exact_cache.get('key'), range(8)))
+    assert results == ['response'] * 8